@@ -0,0 +1,111 @@
+"""Compara os parsers de data e valor do extrato com as implementações anteriores.
+
+As versões antigas (strptime com dois formatos, strip/replace + float e a
+conversão para centavos por regex) estão copiadas abaixo como referência; o
+script também confere que as novas dão o mesmo resultado nas amostras.
+
+Uso: python benchmarks/bench_parsing.py [--rows 200000] [--repeat 5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_extract import iter_extract_lines
+from src.services.parsing import _parse_date, parse_amount_cents, parse_date
+
+def legacy_parse_date(date_str):
+    if not date_str or date_str.strip() == '':
+        return None
+    try:
+        date_clean = date_str.strip()
+        if ' ' in date_clean:
+            return datetime.strptime(date_clean, '%d/%m/%Y %H:%M')
+        else:
+            return datetime.strptime(date_clean, '%d/%m/%Y')
+    except (ValueError, AttributeError):
+        return None
+
+def legacy_parse_float(value_str):
+    if not value_str or value_str.strip() == '':
+        return 0.0
+    try:
+        clean_value = value_str.strip().replace('.', '').replace(',', '.')
+        return float(clean_value)
+    except (ValueError, AttributeError):
+        return 0.0
+
+_LEGACY_AMOUNT_RE = re.compile(r'([+-]?)(\d*)(?:,(\d*))?')
+
+def legacy_parse_cents(value_str):
+    if not value_str:
+        return 0
+    match = _LEGACY_AMOUNT_RE.fullmatch(value_str.strip().replace('.', ''))
+    if match is None:
+        return 0
+    sign, inteiro, fracao = match.groups()
+    fracao = fracao or ''
+    if not inteiro and not fracao:
+        return 0
+    cents = int(inteiro or 0) * 100 + int(fracao[:2].ljust(2, '0'))
+    if len(fracao) > 2 and fracao[2] >= '5':
+        cents += 1
+    return -cents if sign == '-' else cents
+
+def best_of(repeat, func, values, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = iter_extract_lines(args.rows)
+    next(lines)
+    dates, amounts = [], []
+    for line in lines:
+        cells = line.split(';')
+        dates.append(cells[2])
+        amounts.extend(cells[6:8])
+
+    # Conferência: mesmas datas e mesmos valores (float antigo x centavos novos)
+    for value in dates[:10000] + ['', ' 1/2/2025 ', '31/02/2025', '01/01/2025 25:00', 'ontem']:
+        assert parse_date(value) == legacy_parse_date(value), value
+    for value in amounts[:10000] + ['', '-12,34', '1.000.000,00', 'abc', '0,5']:
+        assert parse_amount_cents(value) == round(legacy_parse_float(value) * 100), value
+        assert parse_amount_cents(value) == legacy_parse_cents(value), value
+
+    # Extrato de alto volume: 20 transações por minuto (o gerador usa um minuto por linha)
+    busy_dates = [value for value in dates[:len(dates) // 20] for _ in range(20)]
+
+    clear_cache = _parse_date.cache_clear
+    results = [
+        ('data (antiga, strptime)', best_of(args.repeat, legacy_parse_date, dates), len(dates)),
+        ('data (nova, sem cache)', best_of(args.repeat, parse_date, dates, clear_cache), len(dates)),
+        ('data (nova, 20/minuto)', best_of(args.repeat, parse_date, busy_dates, clear_cache), len(busy_dates)),
+        ('valor (antigo, float)', best_of(args.repeat, legacy_parse_float, amounts), len(amounts)),
+        ('valor (centavos, regex)', best_of(args.repeat, legacy_parse_cents, amounts), len(amounts)),
+        ('valor (novo, centavos)', best_of(args.repeat, parse_amount_cents, amounts), len(amounts)),
+    ]
+    for name, elapsed, count in results:
+        print(f"{name:28} {elapsed * 1000:8.1f} ms  ({count / elapsed:,.0f} células/s)")
+    print(f"Ganho nas datas: {results[0][1] / results[1][1]:.1f}x sem repetição, "
+          f"{results[0][1] / results[2][1]:.1f}x com 20 transações por minuto")
+    print(f"Valores: {results[4][1] / results[5][1]:.1f}x mais rápido que a versão em centavos por regex, "
+          f"{results[5][1] / results[3][1]:.1f}x o custo do float (que não é exato)")
+
+if __name__ == '__main__':
+    main()
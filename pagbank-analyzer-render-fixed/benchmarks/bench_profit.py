@@ -0,0 +1,76 @@
+"""Compara o motor de lucro com NumPy e em Python puro.
+
+Uso: python benchmarks/bench_profit.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.profit import (
+    _client_fees_numpy, _client_fees_python, classify_payment, compute_profit, np, rate_slot
+)
+from src.services.money import rate_units
+
+FORMAS = ['Cartão de Crédito', 'Cartão de Débito', 'PIX', 'Crédito', 'Boleto']
+PARCELAS = ['1x', 'Parcelado 3x', 'Parcelado 12x', '', 'À vista', '25x']
+
+def build_columns(rows, seed=42):
+    rnd = random.Random(seed)
+    columns = {
+        'codigo_transacao': [], 'data_transacao': [], 'forma_pagamento': [], 'parcelas': [],
+        'valor_bruto': [], 'valor_taxa': [], 'slot': []
+    }
+    for i in range(rows):
+        forma = rnd.choice(FORMAS)
+        parcelas = rnd.choice(PARCELAS)
+        bruto = rnd.randrange(100, 500000)
+        columns['codigo_transacao'].append(f'TX{i:08d}')
+        columns['data_transacao'].append('2025-08-01T10:00:00')
+        columns['forma_pagamento'].append(forma)
+        columns['parcelas'].append(parcelas)
+        columns['valor_bruto'].append(bruto)
+        columns['valor_taxa'].append(round(bruto * 0.03))
+        columns['slot'].append(rate_slot(*classify_payment(forma, parcelas)))
+    return columns
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    columns = build_columns(args.rows)
+    rate_vector = [1.5 + 0.5 * n for n in range(18)] + [1.99, 0.99, 0]
+
+    fee_args = (columns['valor_bruto'], columns['valor_taxa'], columns['slot'], [rate_units(r) for r in rate_vector])
+
+    python_fees, _ = best_of(args.repeat, lambda: _client_fees_python(*fee_args))
+    python_time, python_result = best_of(args.repeat, lambda: compute_profit(columns, rate_vector, use_numpy=False))
+    print(f"Python puro: cálculo {python_fees * 1000:.1f} ms, resposta completa {python_time * 1000:.1f} ms "
+          f"({args.rows / python_time:,.0f} transações/s)")
+
+    if np is None:
+        print("NumPy não instalado - apenas o caminho em Python puro foi medido")
+        return
+
+    numpy_fees, _ = best_of(args.repeat, lambda: _client_fees_numpy(*fee_args))
+    numpy_time, numpy_result = best_of(args.repeat, lambda: compute_profit(columns, rate_vector, use_numpy=True))
+    print(f"NumPy:       cálculo {numpy_fees * 1000:.1f} ms, resposta completa {numpy_time * 1000:.1f} ms "
+          f"({args.rows / numpy_time:,.0f} transações/s)")
+    print(f"Ganho no cálculo: {python_fees / numpy_fees:.2f}x, na resposta completa: {python_time / numpy_time:.2f}x")
+    print(f"Resultados idênticos: {numpy_result == python_result}")
+
+if __name__ == '__main__':
+    main()
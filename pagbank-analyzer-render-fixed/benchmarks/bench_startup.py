@@ -0,0 +1,115 @@
+"""Mede o tempo de boot de um worker: import de src.main e primeira requisição.
+
+Cada medição roda em um processo novo, contra um SQLite temporário já criado
+("banco existente") ou vazio ("banco novo"). O modo preload imita o gunicorn com
+preload_app: o processo mestre importa e prepara o banco uma vez e cada worker
+(fork) só atende a primeira requisição.
+
+Para comparar com outro commit, aponte --tree para uma cópia dele
+(ex.: git worktree add /tmp/antes HEAD~1 e --tree com a pasta do projeto dentro dela).
+
+Uso: python benchmarks/bench_startup.py [--runs 5] [--tree .] [-o resultado.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado no processo filho; imprime uma linha JSON com os tempos em ms
+PROBE = r'''
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import src.main
+imported = time.perf_counter()
+client = src.main.app.test_client()
+response = client.get('/api/machines')
+assert response.status_code == 200, response.status_code
+first = time.perf_counter()
+result = {'import_ms': (imported - start) * 1000, 'first_request_ms': (first - imported) * 1000}
+
+if sys.argv[2] == '1':
+    try:
+        from src.services.schema import prepare_app
+        prepare_app(src.main.app)
+    except ImportError:
+        pass  # Árvores sem preparação separada: o import já preparou o banco
+    worker_ms = []
+    for _ in range(3):
+        read_fd, write_fd = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            response = src.main.app.test_client().get('/api/machines')
+            os.write(write_fd, str((time.perf_counter() - forked) * 1000).encode())
+            os._exit(0 if response.status_code == 200 else 1)
+        os.close(write_fd)
+        elapsed = os.read(read_fd, 64)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        worker_ms.append(float(elapsed))
+    result['preload_worker_first_request_ms'] = min(worker_ms)
+print(json.dumps(result))
+'''
+
+def run_probe(tree, database_url, preload=False):
+    env = dict(os.environ, DATABASE_URL=database_url, LOG_LEVEL='WARNING')
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-c', PROBE, tree, '1' if preload else '0'],
+        env=env, capture_output=True, text=True, cwd=tree
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f'Falha ao iniciar a aplicação em {tree}:\n{process.stderr}')
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+def summarize(results):
+    return {key: round(statistics.median(result[key] for result in results), 1) for key in results[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tree', default=ROOT, help='Raiz da árvore do projeto a medir')
+    parser.add_argument('-o', '--output')
+    args = parser.parse_args()
+    tree = os.path.abspath(args.tree)
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    try:
+        existing = os.path.join(workdir, 'existente.db')
+        # Primeira execução cria o banco usado pelas medições de "banco existente"
+        run_probe(tree, f'sqlite:///{existing}')
+
+        fresh_runs = []
+        for run in range(args.runs):
+            fresh = os.path.join(workdir, f'novo-{run}.db')
+            fresh_runs.append(run_probe(tree, f'sqlite:///{fresh}'))
+
+        report = {
+            'tree': tree,
+            'runs': args.runs,
+            'banco_existente': summarize([run_probe(tree, f'sqlite:///{existing}') for _ in range(args.runs)]),
+            'banco_novo': summarize(fresh_runs),
+            'preload': summarize([run_probe(tree, f'sqlite:///{existing}', preload=True) for _ in range(args.runs)]),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as target:
+            target.write(text)
+
+if __name__ == '__main__':
+    main()
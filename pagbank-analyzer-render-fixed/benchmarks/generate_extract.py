@@ -0,0 +1,113 @@
+"""Gera extratos PagBank sintéticos (CSV delimitado por ';') para benchmarks.
+
+Uso: python benchmarks/generate_extract.py --rows 50000 --machines 20 \
+         --duplicates 0.05 --mix credito=0.6,debito=0.25,pix=0.15 -o extrato.csv
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.export import CSV_COLUMNS
+from src.services.money import format_brazilian_cents
+
+DEFAULT_MIX = {'credito': 0.6, 'debito': 0.25, 'pix': 0.15}
+
+FORMAS_PAGAMENTO = {
+    'credito': 'Cartão de Crédito',
+    'debito': 'Cartão de Débito',
+    'pix': 'PIX',
+}
+BANDEIRAS = ['VISA', 'MASTERCARD', 'ELO', 'HIPERCARD', 'AMEX']
+
+# Taxa PagBank aproximada por forma de pagamento (percentual)
+TAXAS_PAGBANK = {'credito': 3.19, 'debito': 1.99, 'pix': 0.99}
+
+def parse_mix(value):
+    """Converte 'credito=0.6,debito=0.3,pix=0.1' em dicionário normalizado"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip().lower()
+        if name not in FORMAS_PAGAMENTO:
+            raise ValueError(f'Forma de pagamento desconhecida: {name}')
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    return {name: weight / total for name, weight in mix.items()}
+
+def _parcelas(rnd, kind):
+    if kind != 'credito':
+        return ''
+    installments = rnd.choices([1, 2, 3, 6, 10, 12, 18], weights=[50, 10, 12, 10, 8, 8, 2])[0]
+    return '1x' if installments == 1 else f'Parcelado {installments}x'
+
+def iter_extract_lines(rows, machines=10, duplicate_ratio=0.0, mix=None, seed=42, start_date=None):
+    """Gera as linhas do extrato (cabeçalho incluso), sem montar o arquivo em memória"""
+    rnd = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    start_date = start_date or datetime(2025, 1, 1)
+    machine_ids = [f'{7000000000 + n}' for n in range(machines)]
+
+    yield ';'.join(CSV_COLUMNS)
+    emitted = []
+    for n in range(rows):
+        # Uma fração das linhas repete transações anteriores (exportações sobrepostas)
+        if emitted and rnd.random() < duplicate_ratio:
+            yield rnd.choice(emitted)
+            continue
+
+        machine_id = rnd.choice(machine_ids)
+        kind = rnd.choices(kinds, weights=weights)[0]
+        bruto = rnd.randrange(500, 300000)
+        liquido = round(bruto * (1 - TAXAS_PAGBANK[kind] / 100))
+        data = start_date + timedelta(minutes=n * 7 + rnd.randrange(7))
+        line = ';'.join([
+            machine_id,
+            f'{rnd.getrandbits(64):016X}{n:08d}',
+            data.strftime('%d/%m/%Y %H:%M'),
+            rnd.choice(BANDEIRAS) if kind != 'pix' else '',
+            FORMAS_PAGAMENTO[kind],
+            _parcelas(rnd, kind),
+            format_brazilian_cents(bruto),
+            format_brazilian_cents(liquido),
+            'Aprovada',
+            f'Cliente {machine_id}',
+            f'cliente{machine_id}@example.com'
+        ])
+        # Guardar apenas uma amostra das linhas para sortear duplicatas com memória limitada
+        if len(emitted) < 10000:
+            emitted.append(line)
+        else:
+            emitted[rnd.randrange(len(emitted))] = line
+        yield line
+
+def generate_extract(rows, **options):
+    """Extrato completo como bytes UTF-8"""
+    return ('\n'.join(iter_extract_lines(rows, **options)) + '\n').encode('utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--machines', type=int, default=10)
+    parser.add_argument('--duplicates', type=float, default=0.0, help='fração de linhas duplicadas (0 a 1)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='ex.: credito=0.6,debito=0.25,pix=0.15')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help='arquivo de saída (padrão: stdout)')
+    args = parser.parse_args()
+
+    lines = iter_extract_lines(args.rows, machines=args.machines, duplicate_ratio=args.duplicates,
+                               mix=args.mix, seed=args.seed)
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for line in lines:
+            output.write(line + '\n')
+    finally:
+        if args.output:
+            output.close()
+
+if __name__ == '__main__':
+    main()
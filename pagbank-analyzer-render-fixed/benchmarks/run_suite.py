@@ -0,0 +1,207 @@
+"""Benchmark de ponta a ponta dos endpoints principais.
+
+Gera um extrato sintético, sobe a aplicação contra um SQLite temporário e
+mede upload, /machines, /calculate-profit e /export-data pelo test client
+do Flask. O resultado (JSON) inclui linhas/s, latência p50/p95, número de
+consultas SQL e pico de memória de cada endpoint, para comparar commits.
+
+Uso: python benchmarks/run_suite.py --rows 50000 --machines 20 -o resultado.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+from benchmarks.generate_extract import DEFAULT_MIX, generate_extract, parse_mix
+from src.models.user import db
+from src.routes.pagbank import pagbank_bp
+from src.routes.user import user_bp
+from src.services.database import configure_database
+from src.services.profit_cache import profit_cache
+from src.services.schema import init_schema
+
+def create_bench_app(database_uri):
+    app = Flask(__name__)
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(pagbank_bp, url_prefix='/api')
+    app.register_blueprint(pagbank_bp, name='pagbank_root')
+    # Mesmos pragmas/pool da aplicação
+    configure_database(app, database_uri)
+    with app.app_context():
+        init_schema()
+    return app
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def _call(counter, call, keep_body=False):
+    start_queries = counter.count
+    start = time.perf_counter()
+    response = call()
+    # Respostas em streaming só são geradas ao ler o corpo; os blocos são descartados
+    # (salvo keep_body) para que o pico de memória reflita o servidor e não o cliente
+    chunks = []
+    size = 0
+    for chunk in response.iter_encoded():
+        size += len(chunk)
+        if keep_body:
+            chunks.append(chunk)
+    elapsed = time.perf_counter() - start
+    response.close()
+    if response.status_code >= 400:
+        raise RuntimeError(f'Status {response.status_code} em {response.request.path}')
+    return b''.join(chunks), elapsed, counter.count - start_queries, size
+
+def measure(counter, call, iterations=1, before_each=None, trace_memory=True, keep_body=False):
+    """Executa a chamada N vezes; devolve latências, consultas por chamada e pico de memória.
+
+    As latências são medidas sem tracemalloc (que deixa tudo mais lento); o pico de
+    memória vem de uma execução extra rastreada, quando trace_memory=True. Com
+    keep_body=True também devolve o corpo JSON da última resposta.
+    """
+    latencies = []
+    queries = []
+    for _ in range(iterations):
+        if before_each:
+            before_each()
+        body, elapsed, query_count, size = _call(counter, call, keep_body)
+        latencies.append(elapsed)
+        queries.append(query_count)
+
+    stats = {
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'queries': max(queries),
+        'response_bytes': size
+    }
+    if trace_memory:
+        if before_each:
+            before_each()
+        tracemalloc.start()
+        _call(counter, call)
+        stats['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    return stats, json.loads(body) if keep_body else None
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(rows, machines, duplicates, mix, iterations):
+    workdir = tempfile.mkdtemp(prefix='pagbank-bench-')
+    try:
+        app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        client = app.test_client()
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+
+        extract = generate_extract(rows, machines=machines, duplicate_ratio=duplicates, mix=mix)
+        results = {
+            'revision': git_revision(),
+            'params': {'rows': rows, 'machines': machines, 'duplicates': duplicates, 'mix': mix,
+                       'iterations': iterations},
+            'extract_bytes': len(extract),
+            'endpoints': {}
+        }
+
+        def upload(target=client):
+            return target.post('/upload', data={'file': (io.BytesIO(extract), 'extrato.csv')})
+
+        # Primeira carga (tudo novo) e reenvio do mesmo arquivo (tudo duplicado)
+        for name in ('upload_new', 'upload_duplicate'):
+            stats, summary = measure(counter, upload, trace_memory=False, keep_body=True)
+            stats['rows_per_s'] = round(rows / (stats['p50_ms'] / 1000), 1)
+            stats['new_transactions'] = summary['new_transactions']
+            stats['skipped_duplicates'] = summary['skipped_duplicates']
+            results['endpoints'][name] = stats
+
+        # Pico de memória do upload medido à parte, em um banco vazio
+        memory_app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'bench-memory.db')}")
+        with memory_app.app_context():
+            memory_counter = QueryCounter(db.engine)
+        tracemalloc.start()
+        _call(memory_counter, lambda: upload(memory_app.test_client()))
+        results['endpoints']['upload_new']['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+        stats, machines_data = measure(counter, lambda: client.get('/api/machines'), iterations, keep_body=True)
+        results['endpoints']['get_machines'] = stats
+        machine_ids = [client_data['machine_id'] for client_data in machines_data['clients']]
+        busiest = max(machines_data['clients'], key=lambda c: c['total_transacoes'])
+        machine_id = busiest['machine_id']
+        transactions = busiest['total_transacoes']
+
+        def calculate_profit():
+            return client.post(f'/api/calculate-profit/{machine_id}')
+
+        stats, _ = measure(counter, calculate_profit, iterations,
+                           before_each=lambda: profit_cache.invalidate(machine_id))
+        stats['rows_per_s'] = round(transactions / (stats['p50_ms'] / 1000), 1)
+        results['endpoints']['calculate_profit_cold'] = stats
+
+        stats, _ = measure(counter, calculate_profit, iterations)
+        results['endpoints']['calculate_profit_cached'] = stats
+
+        for export_format in ('json', 'ndjson', 'csv'):
+            stats, _ = measure(counter, lambda: client.get(f'/api/export-data/{machine_id}?format={export_format}'),
+                               iterations)
+            stats['rows_per_s'] = round(transactions / (stats['p50_ms'] / 1000), 1)
+            results['endpoints'][f'export_data_{export_format}'] = stats
+
+        stats, _ = measure(counter, lambda: client.get('/api/export-data?format=ndjson'), 1)
+        stats['rows_per_s'] = round(rows / (stats['p50_ms'] / 1000), 1)
+        results['endpoints']['export_all_ndjson'] = stats
+
+        results['machines'] = len(machine_ids)
+        results['profit_machine_transactions'] = transactions
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--machines', type=int, default=10)
+    parser.add_argument('--duplicates', type=float, default=0.02)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('-o', '--output', help='grava o JSON em arquivo (padrão: stdout)')
+    args = parser.parse_args()
+
+    # Os logs da aplicação vão para stderr para não misturar com o JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args.rows, args.machines, args.duplicates, args.mix, args.iterations)
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# Configuração do gunicorn (lida automaticamente do diretório de trabalho)
+import os
+
+# Carregar a aplicação uma vez no processo mestre: os workers nascem por fork já com
+# os imports feitos e o banco preparado (GUNICORN_PRELOAD=0 volta a carregar por worker)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+def on_starting(server):
+    # Com preload_app a aplicação já foi importada aqui; preparar o esquema e os
+    # arquivos estáticos antes do fork
+    if server.cfg.preload_app:
+        from src.main import app
+        from src.services.schema import prepare_app
+        prepare_app(app)
+        app.extensions['static_assets'].load()
+
+def post_fork(server, worker):
+    # Threads iniciadas no mestre não existem no worker: iniciar a dos logs neste processo
+    from src.services.logs import restart_logging
+    restart_logging()
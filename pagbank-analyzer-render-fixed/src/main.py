@@ -3,43 +3,73 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
-from src.models.user import db
-from src.models.client_config import ClientConfig
-from src.models.machine import Machine, MachineConfig, Transaction
+from flask import Flask, current_app
 from src.routes.user import user_bp
 from src.routes.pagbank import pagbank_bp
+from src.services.api_responses import init_api_responses
+from src.services.database import configure_database
+from src.services.instrumentation import init_instrumentation
+from src.services.logs import configure_logging
+from src.services.multi_upload import MAX_UPLOAD_BYTES
+from src.services.schema import init_lazy_schema, init_schema
+from src.services.static_assets import StaticAssets, asset_response
+from src.services.summaries import rebuild_summaries
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+def create_app(database_uri=None):
+    """Cria a aplicação sem tocar no banco (o esquema é preparado por init-db, preload ou na primeira requisição)"""
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+    # Corpo máximo das requisições (uploads): acima disso a resposta é 413
+    app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(pagbank_bp, url_prefix='/api')
-app.register_blueprint(pagbank_bp, name='pagbank_root')  # Registrar também sem prefixo para /upload
+    # Logs com nível (LOG_LEVEL) e uma linha de resumo por requisição
+    configure_logging(app)
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(pagbank_bp, url_prefix='/api')
+    app.register_blueprint(pagbank_bp, name='pagbank_root')  # Registrar também sem prefixo para /upload
+
+    # Métricas por requisição (opcional, PERF_INSTRUMENTATION=1)
+    init_instrumentation(app)
+
+    # JSON pelo orjson quando instalado e compressão br/gzip das respostas grandes
+    init_api_responses(app)
+
+    # Banco: DATABASE_URL ou SQLite local, com pragmas/pool ajustáveis por variáveis de ambiente
+    configure_database(app, database_uri)
+    init_lazy_schema(app)
+
+    app.cli.command('init-db')(init_db_command)
+    app.cli.command('rebuild-summaries')(rebuild_summaries_command)
+
+    # Arquivos estáticos lidos e comprimidos uma vez por processo (ver services.static_assets)
+    app.extensions['static_assets'] = StaticAssets(app.static_folder)
+    app.add_url_rule('/', 'serve', serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve)
+    return app
+
+def init_db_command():
+    """Cria as tabelas e aplica as migrações pendentes"""
+    init_schema()
+    print("✅ Banco de dados pronto")
+
+def rebuild_summaries_command():
+    """Recalcula a tabela de totais por máquina a partir das transações"""
+    rebuild_summaries()
+    print("✅ Totais consolidados reconstruídos")
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+    assets = current_app.extensions['static_assets']
+    found = assets.lookup(path or 'index.html')
+    if found is None:
+        # Demais caminhos são do frontend: devolver o index.html
+        index = assets.lookup('index.html')
+        if index is None:
             return "index.html not found", 404
+        found = (index[0], False)
+    return asset_response(*found)
 
+app = create_app()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
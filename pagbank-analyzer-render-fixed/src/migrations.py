@@ -0,0 +1,108 @@
+import logging
+from sqlalchemy import BigInteger, cast, func, inspect, select, text, update
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Alterações de esquema em bancos já existentes (db.create_all só cria tabelas novas).
+# Cada passo verifica o estado atual antes de agir, então rodar de novo não tem efeito.
+
+def _columns(table_name):
+    return {column['name'] for column in inspect(db.engine).get_columns(table_name)}
+
+def _add_column_if_missing(table_name, column_name, ddl):
+    if column_name in _columns(table_name):
+        return False
+    db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl}'))
+    logger.info("🛠️ Coluna %s.%s adicionada", table_name, column_name)
+    return True
+
+def _create_index_if_missing(index_name, table_name, columns):
+    indexes = {index['name'] for index in inspect(db.engine).get_indexes(table_name)}
+    if index_name in indexes:
+        return False
+    db.session.execute(text(f'CREATE INDEX {index_name} ON {table_name} ({", ".join(columns)})'))
+    logger.info("🛠️ Índice %s criado", index_name)
+    return True
+
+def _add_ingest_version():
+    _add_column_if_missing('machine_summaries', 'ingest_version', 'INTEGER NOT NULL DEFAULT 0')
+
+def _add_transactions_machine_data_index():
+    _create_index_if_missing('ix_transactions_machine_data', 'transactions', ['machine_id', 'data_transacao'])
+
+def _add_payment_normalization():
+    _add_column_if_missing('transactions', 'tipo_pagamento', 'SMALLINT')
+    _add_column_if_missing('transactions', 'num_parcelas', 'SMALLINT')
+    # Preencher as linhas antigas: uma atualização por combinação distinta de forma/parcelas
+    from src.models.machine import Transaction
+    from src.services.profit import classify_payment
+    transactions = Transaction.__table__
+    pending = db.session.execute(
+        select(transactions.c.forma_pagamento, transactions.c.parcelas)
+        .where(transactions.c.tipo_pagamento.is_(None))
+        .distinct()
+    ).all()
+    for forma_pagamento, parcelas in pending:
+        tipo_pagamento, num_parcelas = classify_payment(forma_pagamento, parcelas)
+        db.session.execute(
+            update(transactions)
+            .where(
+                transactions.c.tipo_pagamento.is_(None),
+                transactions.c.forma_pagamento.is_not_distinct_from(forma_pagamento),
+                transactions.c.parcelas.is_not_distinct_from(parcelas)
+            )
+            .values(tipo_pagamento=tipo_pagamento, num_parcelas=num_parcelas)
+        )
+    if pending:
+        logger.info("🛠️ Forma de pagamento normalizada em %d combinações de transações antigas", len(pending))
+
+def _add_integer_cents():
+    added = _add_column_if_missing('transactions', 'valor_bruto_centavos', 'BIGINT')
+    _add_column_if_missing('transactions', 'valor_taxa_centavos', 'BIGINT')
+    _add_column_if_missing('transactions', 'valor_liquido_centavos', 'BIGINT')
+    # Preencher a partir dos valores em reais; a taxa é recalculada como bruto - líquido
+    from src.models.machine import Transaction
+    transactions = Transaction.__table__
+    result = db.session.execute(
+        update(transactions)
+        .where(transactions.c.valor_bruto_centavos.is_(None))
+        .values(
+            valor_bruto_centavos=cast(func.round(transactions.c.valor_bruto * 100), BigInteger),
+            valor_liquido_centavos=cast(func.round(transactions.c.valor_liquido * 100), BigInteger)
+        )
+    )
+    db.session.execute(
+        update(transactions)
+        .where(transactions.c.valor_taxa_centavos.is_(None))
+        .values(valor_taxa_centavos=transactions.c.valor_bruto_centavos - transactions.c.valor_liquido_centavos)
+    )
+    if added or result.rowcount:
+        logger.info("🛠️ Valores em centavos preenchidos em %d transações", result.rowcount)
+
+def _recreate_summaries_in_cents():
+    # Tabelas consolidadas são derivadas: recriar com totais em centavos e reconstruir
+    if 'valor_bruto_centavos' in _columns('machine_summaries'):
+        return
+    from src.models.machine_summary import MachineDailySummary, MachineSummary
+    from src.services.summaries import rebuild_summaries
+    connection = db.session.connection()
+    for model in (MachineDailySummary, MachineSummary):
+        model.__table__.drop(connection)
+        model.__table__.create(connection)
+    rebuild_summaries()
+    logger.info("🛠️ Totais consolidados recriados em centavos")
+
+MIGRATIONS = [
+    _add_ingest_version,
+    _add_transactions_machine_data_index,
+    _add_payment_normalization,
+    _add_integer_cents,
+    _recreate_summaries_in_cents,
+]
+
+def run_migrations():
+    """Aplica as alterações de esquema pendentes"""
+    for migration in MIGRATIONS:
+        migration()
+    db.session.commit()
@@ -1,4 +1,5 @@
 from src.models.user import db
+from src.models.rate_schedule import RateSchedule
 
 class ClientConfig(db.Model):
     __tablename__ = 'client_configs'
@@ -36,47 +37,29 @@ class ClientConfig(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
     
+    @property
+    def rate_schedule(self):
+        return RateSchedule.from_model(self)
+    
     def to_dict(self):
         return {
             'id': self.id,
             'client_name': self.client_name,
             'client_email': self.client_email,
-            'credit_rates': {
-                '1x': self.credit_1x,
-                '2x': self.credit_2x,
-                '3x': self.credit_3x,
-                '4x': self.credit_4x,
-                '5x': self.credit_5x,
-                '6x': self.credit_6x,
-                '7x': self.credit_7x,
-                '8x': self.credit_8x,
-                '9x': self.credit_9x,
-                '10x': self.credit_10x,
-                '11x': self.credit_11x,
-                '12x': self.credit_12x,
-                '13x': self.credit_13x,
-                '14x': self.credit_14x,
-                '15x': self.credit_15x,
-                '16x': self.credit_16x,
-                '17x': self.credit_17x,
-                '18x': self.credit_18x,
-            },
-            'debit_rate': self.debit_rate,
-            'pix_rate': self.pix_rate,
+            **self.rate_schedule.to_legacy_dict(),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def get_rate_for_payment(self, payment_type, installments=1):
         """Retorna a taxa configurada para um tipo de pagamento específico"""
-        if payment_type.lower() == 'pix':
+        payment_type = payment_type.lower()
+        if payment_type == 'pix':
             return self.pix_rate
-        elif payment_type.lower() == 'débito':
+        elif payment_type == 'débito':
             return self.debit_rate
-        elif payment_type.lower() == 'crédito':
-            # Mapear número de parcelas para o atributo correto
-            rate_attr = f'credit_{installments}x'
-            return getattr(self, rate_attr, self.credit_1x)
+        elif payment_type == 'crédito':
+            # Parcelas fora de 1x..18x usam a taxa de 1x
+            return self.rate_schedule.credit(installments)
         else:
             return 0.0
-
@@ -0,0 +1,42 @@
+import json
+from src.models.user import db
+from datetime import datetime
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255))
+
+    # pending, running, done, error
+    status = db.Column(db.String(20), nullable=False, default='pending')
+
+    # Progresso da importação
+    rows_parsed = db.Column(db.Integer, default=0)
+    rows_inserted = db.Column(db.Integer, default=0)
+    duplicates_skipped = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Integer, default=0)
+    error_message = db.Column(db.Text)
+
+    # Resumo final (mesmo JSON retornado pelo upload síncrono)
+    result = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_parsed': self.rows_parsed or 0,
+            'rows_inserted': self.rows_inserted or 0,
+            'duplicates_skipped': self.duplicates_skipped or 0,
+            'errors': self.errors or 0,
+            'error_message': self.error_message,
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,6 +1,12 @@
+import logging
 from src.models.user import db
+from src.models.machine_summary import MachineSummary
+from src.models.rate_schedule import RateSchedule
+from src.services.money import cents_to_reais
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 class Machine(db.Model):
     __tablename__ = 'machines'
     
@@ -27,18 +33,40 @@ class Machine(db.Model):
     
     def get_summary(self):
         """Retorna resumo financeiro da máquina"""
-        total_bruto = sum(t.valor_bruto for t in self.transactions if t.valor_bruto)
-        total_taxa_pagbank = sum(t.valor_taxa for t in self.transactions if t.valor_taxa)
-        total_liquido_pagbank = sum(t.valor_liquido for t in self.transactions if t.valor_liquido)
+        summaries = Machine.get_summaries([self.machine_id])
+        return summaries[0] if summaries else Machine._summary_dict(self, 0, 0, 0, 0)
+    
+    @staticmethod
+    def get_summaries(machine_ids=None):
+        """Resumo financeiro de várias máquinas, lido da tabela de totais consolidados"""
+        query = (
+            db.session.query(
+                Machine.machine_id, Machine.client_name, Machine.client_email,
+                MachineSummary.total_transacoes, MachineSummary.valor_bruto_centavos,
+                MachineSummary.valor_taxa_centavos, MachineSummary.valor_liquido_centavos
+            )
+            .outerjoin(MachineSummary, MachineSummary.machine_id == Machine.machine_id)
+            .order_by(Machine.id)
+        )
+        if machine_ids is not None:
+            query = query.filter(Machine.machine_id.in_(machine_ids))
         
+        return [
+            Machine._summary_dict(row, row.total_transacoes, row.valor_bruto_centavos,
+                                  row.valor_taxa_centavos, row.valor_liquido_centavos)
+            for row in query
+        ]
+    
+    @staticmethod
+    def _summary_dict(machine, total_transacoes, total_bruto, total_taxa, total_liquido):
         return {
-            'machine_id': self.machine_id,
-            'client_name': self.client_name,
-            'client_email': self.client_email,
-            'total_transacoes': len(self.transactions),
-            'valor_bruto_total': total_bruto,
-            'valor_taxa_total': total_taxa_pagbank,
-            'valor_liquido_total': total_liquido_pagbank
+            'machine_id': machine.machine_id,
+            'client_name': machine.client_name,
+            'client_email': machine.client_email,
+            'total_transacoes': total_transacoes or 0,
+            'valor_bruto_total': cents_to_reais(total_bruto),
+            'valor_taxa_total': cents_to_reais(total_taxa),
+            'valor_liquido_total': cents_to_reais(total_liquido)
         }
 
 class MachineConfig(db.Model):
@@ -74,71 +102,32 @@ class MachineConfig(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @property
+    def rate_schedule(self):
+        """Taxas da máquina em um único vetor imutável"""
+        return RateSchedule.from_model(self)
+    
     def to_dict(self):
         """Converte configuração para dicionário"""
         return {
             'machine_id': self.machine_id,
-            'credito_1x': self.credit_1x,
-            'credito_2x': self.credit_2x,
-            'credito_3x': self.credit_3x,
-            'credito_4x': self.credit_4x,
-            'credito_5x': self.credit_5x,
-            'credito_6x': self.credit_6x,
-            'credito_7x': self.credit_7x,
-            'credito_8x': self.credit_8x,
-            'credito_9x': self.credit_9x,
-            'credito_10x': self.credit_10x,
-            'credito_11x': self.credit_11x,
-            'credito_12x': self.credit_12x,
-            'credito_13x': self.credit_13x,
-            'credito_14x': self.credit_14x,
-            'credito_15x': self.credit_15x,
-            'credito_16x': self.credit_16x,
-            'credito_17x': self.credit_17x,
-            'credito_18x': self.credit_18x,
-            'debito': self.debit_rate,
-            'pix': self.pix_rate,
+            **self.rate_schedule.to_config_dict(),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def update_from_dict(self, data):
-        """Atualiza configuração a partir de dicionário"""
-        print(f"🔧 Atualizando configuração com dados: {data}")
-        
-        # Atualizar taxas de crédito individuais (credito_1x, credito_2x, etc.)
-        for i in range(1, 19):
-            field_name = f'credito_{i}x'
-            if field_name in data and data[field_name] is not None:
-                setattr(self, f'credit_{i}x', float(data[field_name] or 0))
-                print(f"✅ {field_name}: {data[field_name]}%")
-        
-        # Atualizar outras taxas
-        if 'debito' in data and data['debito'] is not None:
-            self.debit_rate = float(data['debito'] or 0)
-            print(f"✅ débito: {data['debito']}%")
-        
-        if 'pix' in data and data['pix'] is not None:
-            self.pix_rate = float(data['pix'] or 0)
-            print(f"✅ pix: {data['pix']}%")
-        
-        # Compatibilidade com formato antigo
-        if 'credit_rates' in data:
-            for parcela, taxa in data['credit_rates'].items():
-                if parcela in ['1x', '2x', '3x', '4x', '5x', '6x', '7x', '8x', '9x', '10x', 
-                              '11x', '12x', '13x', '14x', '15x', '16x', '17x', '18x']:
-                    setattr(self, f'credit_{parcela}', float(taxa or 0))
-        
-        if 'debit_rate' in data:
-            self.debit_rate = float(data['debit_rate'] or 0)
-        
-        if 'pix_rate' in data:
-            self.pix_rate = float(data['pix_rate'] or 0)
-        
+        """Atualiza configuração a partir de dicionário (credito_Nx/debito/pix ou o formato antigo)"""
+        logger.debug("🔧 Atualizando configuração com dados: %s", data)
+        self.rate_schedule.updated(data).apply_to(self)
         self.updated_at = datetime.utcnow()
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Listagem paginada por máquina ordenada por data
+        db.Index('ix_transactions_machine_data', 'machine_id', 'data_transacao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     machine_id = db.Column(db.String(50), db.ForeignKey('machines.machine_id'), nullable=False)
@@ -153,7 +142,16 @@ class Transaction(db.Model):
     forma_pagamento = db.Column(db.String(50))
     parcelas = db.Column(db.String(20))
     
-    # Valores
+    # Forma de pagamento e parcelas normalizadas na importação (ver services.profit.classify_payment)
+    tipo_pagamento = db.Column(db.SmallInteger)
+    num_parcelas = db.Column(db.SmallInteger)
+    
+    # Valores em centavos (usados em todos os cálculos)
+    valor_bruto_centavos = db.Column(db.BigInteger)
+    valor_taxa_centavos = db.Column(db.BigInteger)
+    valor_liquido_centavos = db.Column(db.BigInteger)
+    
+    # Valores em reais (float), mantidos por compatibilidade
     valor_bruto = db.Column(db.Float, nullable=False)
     valor_taxa = db.Column(db.Float, nullable=False)
     valor_liquido = db.Column(db.Float, nullable=False)
@@ -181,9 +179,9 @@ class Transaction(db.Model):
             'bandeira': self.bandeira,
             'forma_pagamento': self.forma_pagamento,
             'parcelas': self.parcelas,
-            'valor_bruto': self.valor_bruto,
-            'valor_taxa_pagbank': self.valor_taxa,
-            'valor_liquido': self.valor_liquido,
+            'valor_bruto': cents_to_reais(self.valor_bruto_centavos),
+            'valor_taxa_pagbank': cents_to_reais(self.valor_taxa_centavos),
+            'valor_liquido': cents_to_reais(self.valor_liquido_centavos),
             'status': self.status,
             'numero_cartao': self.numero_cartao,
             'codigo_nsu': self.codigo_nsu,
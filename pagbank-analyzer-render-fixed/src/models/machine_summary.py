@@ -0,0 +1,41 @@
+from src.models.user import db
+from datetime import datetime
+
+class MachineSummary(db.Model):
+    """Totais acumulados por máquina, atualizados a cada importação"""
+    __tablename__ = 'machine_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    machine_id = db.Column(db.String(50), db.ForeignKey('machines.machine_id'), nullable=False, unique=True)
+
+    total_transacoes = db.Column(db.Integer, nullable=False, default=0)
+    # Totais em centavos
+    valor_bruto_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+    valor_taxa_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+    valor_liquido_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+
+    # Incrementado a cada lote importado para a máquina (invalida caches de lucro)
+    ingest_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MachineDailySummary(db.Model):
+    """Totais por máquina, dia, forma de pagamento e parcela"""
+    __tablename__ = 'machine_daily_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('machine_id', 'dia', 'forma_pagamento', 'parcelas', name='uq_machine_daily_summary'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    machine_id = db.Column(db.String(50), db.ForeignKey('machines.machine_id'), nullable=False)
+    dia = db.Column(db.Date, nullable=False)
+    forma_pagamento = db.Column(db.String(50), nullable=False, default='')
+    parcelas = db.Column(db.String(20), nullable=False, default='')
+
+    total_transacoes = db.Column(db.Integer, nullable=False, default=0)
+    # Totais em centavos
+    valor_bruto_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+    valor_taxa_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+    valor_liquido_centavos = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
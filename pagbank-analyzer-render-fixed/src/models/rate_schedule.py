@@ -0,0 +1,109 @@
+from operator import attrgetter
+
+# Layout do vetor de taxas: crédito 1x..18x nas posições 0..17, depois débito e PIX.
+# É o mesmo layout usado no cálculo de lucro (ver services.profit.rate_slot).
+MAX_PARCELAS = 18
+SLOT_DEBITO = 18
+SLOT_PIX = 19
+SCHEDULE_SIZE = 20
+# Posição extra do vetor de cálculo para transações sem taxa configurável
+SLOT_SEM_TAXA = 20
+
+# Colunas dos modelos de configuração, na ordem do vetor
+CREDIT_COLUMNS = tuple(f'credit_{n}x' for n in range(1, MAX_PARCELAS + 1))
+SCHEDULE_COLUMNS = CREDIT_COLUMNS + ('debit_rate', 'pix_rate')
+
+# Chaves do JSON de configuração (MachineConfig.to_dict), na ordem do vetor
+CONFIG_FIELDS = tuple(f'credito_{n}x' for n in range(1, MAX_PARCELAS + 1)) + ('debito', 'pix')
+
+# Formato antigo: {'credit_rates': {'1x': ...}, 'debit_rate': ..., 'pix_rate': ...}
+LEGACY_CREDIT_SLOTS = {f'{n}x': n - 1 for n in range(1, MAX_PARCELAS + 1)}
+
+_read_columns = attrgetter(*SCHEDULE_COLUMNS)
+
+def _rate(value):
+    return float(value or 0)
+
+class RateSchedule:
+    """Tabela de taxas imutável: crédito 1x..18x, débito e PIX em um único vetor"""
+
+    __slots__ = ('_rates',)
+
+    def __init__(self, rates):
+        rates = tuple(_rate(rate) for rate in rates)
+        if len(rates) != SCHEDULE_SIZE:
+            raise ValueError(f'Tabela de taxas deve ter {SCHEDULE_SIZE} posições')
+        object.__setattr__(self, '_rates', rates)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('RateSchedule é imutável')
+
+    @classmethod
+    def from_model(cls, config):
+        """Lê as colunas de MachineConfig/ClientConfig"""
+        return cls(_read_columns(config))
+
+    def updated(self, data):
+        """Nova tabela com os valores de um JSON de configuração (formato atual ou antigo)"""
+        rates = list(self._rates)
+        for slot, field in enumerate(CONFIG_FIELDS):
+            # Formato atual: campo ausente ou null mantém a taxa
+            if data.get(field) is not None:
+                rates[slot] = _rate(data[field])
+        # Compatibilidade com formato antigo
+        for parcela, taxa in (data.get('credit_rates') or {}).items():
+            if parcela in LEGACY_CREDIT_SLOTS:
+                rates[LEGACY_CREDIT_SLOTS[parcela]] = _rate(taxa)
+        if 'debit_rate' in data:
+            rates[SLOT_DEBITO] = _rate(data['debit_rate'])
+        if 'pix_rate' in data:
+            rates[SLOT_PIX] = _rate(data['pix_rate'])
+        return RateSchedule(rates)
+
+    def apply_to(self, config):
+        """Grava a tabela nas colunas do modelo"""
+        for column, rate in self.to_columns_dict().items():
+            setattr(config, column, rate)
+
+    def credit(self, installments):
+        """Taxa de crédito em N parcelas (fora de 1..18: a taxa de 1x)"""
+        try:
+            installments = int(installments)
+        except (TypeError, ValueError):
+            return self._rates[0]
+        return self._rates[installments - 1] if 1 <= installments <= MAX_PARCELAS else self._rates[0]
+
+    @property
+    def debit(self):
+        return self._rates[SLOT_DEBITO]
+
+    @property
+    def pix(self):
+        return self._rates[SLOT_PIX]
+
+    def vector(self):
+        """Vetor usado no cálculo de lucro (inclui a posição 'sem taxa')"""
+        return list(self._rates) + [0]
+
+    def to_columns_dict(self):
+        """Valores por coluna dos modelos (credit_Nx, debit_rate, pix_rate)"""
+        return dict(zip(SCHEDULE_COLUMNS, self._rates))
+
+    def to_config_dict(self):
+        return dict(zip(CONFIG_FIELDS, self._rates))
+
+    def to_legacy_dict(self):
+        return {
+            'credit_rates': dict(zip(LEGACY_CREDIT_SLOTS, self._rates)),
+            'debit_rate': self.debit,
+            'pix_rate': self.pix
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, RateSchedule) and self._rates == other._rates
+
+    def __hash__(self):
+        return hash(self._rates)
+
+    def __repr__(self):
+        return f'RateSchedule({list(self._rates)!r})'
@@ -1,36 +1,29 @@
-import csv
-import io
-from datetime import datetime
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from src.models.user import db
 from src.models.machine import Machine, MachineConfig, Transaction
+from src.services.api_responses import rows_to_columns
+from src.services.bulk_config import apply_bulk_config
+from src.services.config_cache import config_cache
+from src.services.csv_stream import iter_csv_rows
+from src.services.export import iter_csv, iter_ndjson
+from src.services.import_jobs import enqueue_import, load_import_job
+from src.services.instrumentation import record_rows
+from src.services.logs import count, tag
+from src.services.money import cents_to_reais
+from src.services.multi_upload import import_extracts
+from src.services.ingest import BulkImporter, upload_summary
+from src.services.profit import build_rate_vector, compute_profit, load_profit_columns
+from src.services.profit_cache import profit_cache, profit_etag, profit_version
+from src.services.rate_simulator import simulate_rates
+from src.services.reports import revenue_report
+from src.services.summaries import remove_machine_summaries
+from src.services.transaction_pages import transactions_page
 
 pagbank_bp = Blueprint('pagbank', __name__)
 
-def parse_brazilian_float(value_str):
-    """Converte string no formato brasileiro para float"""
-    if not value_str or value_str.strip() == '':
-        return 0.0
-    try:
-        # Remove espaços e substitui vírgula por ponto
-        clean_value = value_str.strip().replace('.', '').replace(',', '.')
-        return float(clean_value)
-    except (ValueError, AttributeError):
-        return 0.0
-
-def parse_brazilian_date(date_str):
-    """Converte string de data brasileira para datetime"""
-    if not date_str or date_str.strip() == '':
-        return None
-    try:
-        # Formato: DD/MM/YYYY HH:MM ou DD/MM/YYYY
-        date_clean = date_str.strip()
-        if ' ' in date_clean:
-            return datetime.strptime(date_clean, '%d/%m/%Y %H:%M')
-        else:
-            return datetime.strptime(date_clean, '%d/%m/%Y')
-    except (ValueError, AttributeError):
-        return None
+logger = logging.getLogger(__name__)
 
 @pagbank_bp.route('/upload', methods=['POST'])
 @pagbank_bp.route('/upload-csv', methods=['POST'])
@@ -39,154 +32,89 @@ def upload_csv():
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'Nenhum arquivo enviado'})
         
-        file = request.files['file']
-        if file.filename == '':
+        files = [f for f in request.files.getlist('file') if f.filename != '']
+        if not files:
             return jsonify({'success': False, 'error': 'Nenhum arquivo selecionado'})
-        
-        # Ler conteúdo do arquivo
-        content = file.read().decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(content), delimiter=';')  # Usar ponto e vírgula como delimitador
+        file = files[0]
+        
+        # ?strict=1: rejeitar linhas com células malformadas (padrão: valor zerado e reportado)
+        strict = request.args.get('strict') == '1' or request.form.get('strict') == '1'
+        
+        # Vários extratos ou um .zip: leitura em paralelo e resumo por arquivo
+        if len(files) > 1 or file.filename.lower().endswith('.zip'):
+            try:
+                importer, per_file = import_extracts(files, strict=strict)
+            except ValueError as e:
+                db.session.rollback()
+                return jsonify({'success': False, 'error': str(e)}), 400
+            db.session.commit()
+            record_rows(importer.total_rows)
+            count('arquivos', len(per_file))
+            count('linhas', importer.total_rows)
+            count('novas', importer.new_transactions)
+            count('duplicadas', importer.skipped_duplicates)
+            count('celulas_malformadas', importer.malformed_cells)
+            return jsonify({**upload_summary(importer), 'files': per_file})
+        
+        # Arquivos grandes: importar em segundo plano e devolver o id do job
+        if request.args.get('async') == '1' or request.form.get('async') == '1':
+            job = enqueue_import(current_app._get_current_object(), file, strict=strict)
+            logger.info("🕒 Importação de %s enfileirada como job %s", file.filename, job.id)
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/api/import-jobs/{job.id}'
+            }), 202
+        
+        # Ler o arquivo em streaming (UTF-8 ou latin-1/cp1252), delimitado por ponto e vírgula
+        csv_reader = iter_csv_rows(file.stream)
         
         # NÃO limpar dados existentes - apenas adicionar novos
-        print("📊 Mantendo dados existentes e adicionando novos...")
+        logger.debug("🔍 Iniciando processamento do CSV (mantendo dados existentes)")
         
-        new_transactions = 0
-        updated_machines = set()
-        total_rows = 0
-        skipped_duplicates = 0
-        
-        print(f"🔍 Iniciando processamento do CSV...")
-        
-        for row in csv_reader:
-            total_rows += 1
-            if total_rows <= 5:  # Mostrar apenas primeiras 5 linhas para debug
-                print(f"📋 Linha {total_rows}: {list(row.keys())[:5]}...")  # Mostrar primeiras 5 colunas
-                print(f"📋 Valores: {list(row.values())[:5]}...")  # Mostrar primeiros 5 valores
-            
-            machine_id = row.get('Identificação da Maquininha', '')  # Nome correto da coluna
-            codigo_transacao = row.get('Código da Transação', '')
-            
-            if total_rows <= 5:  # Debug das primeiras linhas
-                print(f"🏷️ Linha {total_rows} - Máquina: '{machine_id}', Código: '{codigo_transacao}'")
-            
-            if not machine_id or not codigo_transacao:
-                if total_rows <= 10:  # Debug das primeiras 10 linhas
-                    print(f"⚠️ Linha {total_rows} ignorada: máquina='{machine_id}', código='{codigo_transacao}'")
-                continue
-            
-            # Verificar se a transação já existe para evitar duplicatas
-            existing_transaction = Transaction.query.filter_by(codigo_transacao=codigo_transacao).first()
-            if existing_transaction:
-                skipped_duplicates += 1
-                if skipped_duplicates <= 5:  # Log apenas as primeiras 5 duplicatas
-                    print(f"🔄 Transação duplicada ignorada: {codigo_transacao}")
-                continue
-                
-            machine_id = machine_id.strip()
-            codigo_transacao = codigo_transacao.strip()
-            
-            if not machine_id or not codigo_transacao:
-                if total_rows <= 10:  # Debug das primeiras 10 linhas
-                    print(f"⚠️ Linha {total_rows} ignorada após strip: máquina='{machine_id}', código='{codigo_transacao}'")
-                continue
-            
-            # Verificar se a transação já existe (removido para processar todas)
-            # existing_transaction = Transaction.query.filter_by(codigo_transacao=codigo_transacao).first()
-            # if existing_transaction:
-            #     print(f"⚠️ Transação {codigo_transacao} já existe, pulando...")
-            #     continue  # Pular transações duplicadas
-            
-            # Buscar ou criar máquina
-            machine = Machine.query.filter_by(machine_id=machine_id).first()
-            if not machine:
-                client_name = row.get('Nome Cliente', '') or ''
-                client_email = row.get('E-mail Cliente', '') or ''
-                
-                machine = Machine(
-                    machine_id=machine_id,
-                    client_name=client_name.strip(),
-                    client_email=client_email.strip()
-                )
-                db.session.add(machine)
-                db.session.flush()  # Para obter o ID
-                
-                # Criar configuração padrão
-                config = MachineConfig(machine_id=machine_id)
-                db.session.add(config)
-            else:
-                # Atualizar dados da máquina se necessário
-                client_name = row.get('Nome Cliente', '') or machine.client_name
-                client_email = row.get('E-mail Cliente', '') or machine.client_email
-                
-                machine.client_name = client_name.strip()
-                machine.client_email = client_email.strip()
-                machine.updated_at = datetime.utcnow()
-            
-            # Criar nova transação
-            data_transacao_str = row.get('Data da Transação', '') or ''
-            bandeira = row.get('Bandeira', '') or ''
-            forma_pagamento = row.get('Forma de Pagamento', '') or ''
-            parcelas = row.get('Parcela', '') or ''  # Nome correto da coluna
-            valor_bruto_str = row.get('Valor Bruto', '0') or '0'
-            valor_liquido_str = row.get('Valor Líquido', '0') or '0'
-            status = row.get('Status', '') or ''
-            
-            # Calcular taxa PagBank (diferença entre bruto e líquido)
-            valor_bruto = parse_brazilian_float(valor_bruto_str)
-            valor_liquido = parse_brazilian_float(valor_liquido_str)
-            valor_taxa = valor_bruto - valor_liquido
-            
-            transaction = Transaction(
-                machine_id=machine_id,
-                codigo_transacao=codigo_transacao,
-                data_transacao=parse_brazilian_date(data_transacao_str),
-                forma_pagamento=forma_pagamento.strip(),
-                parcelas=parcelas.strip(),
-                valor_bruto=valor_bruto,
-                valor_taxa=valor_taxa,
-                valor_liquido=valor_liquido,
-                status=status.strip()
-            )
-            
-            db.session.add(transaction)
-            new_transactions += 1
-            updated_machines.add(machine_id)
+        # Duplicatas e máquinas são resolvidas em lote, com inserts em massa
+        importer = BulkImporter(strict=strict)
+        importer.import_rows(csv_reader)
+        record_rows(importer.total_rows)
         
         db.session.commit()
         
-        print(f"✅ Processamento concluído:")
-        print(f"📊 Total de linhas processadas: {total_rows}")
-        print(f"💾 Novas transações adicionadas: {new_transactions}")
-        print(f"🔄 Transações duplicadas ignoradas: {skipped_duplicates}")
-        print(f"🏷️ Máquinas atualizadas: {len(updated_machines)}")
+        count('linhas', importer.total_rows)
+        count('novas', importer.new_transactions)
+        count('duplicadas', importer.skipped_duplicates)
+        count('maquinas_atualizadas', len(importer.updated_machines))
+        count('celulas_malformadas', importer.malformed_cells)
         
-        # Buscar todas as máquinas para retornar (incluindo as existentes)
-        machines = Machine.query.all()
-        machines_data = [machine.get_summary() for machine in machines]
+        summary = upload_summary(importer)
         
-        print(f"📈 Total de máquinas no sistema: {len(machines_data)}")
-        
-        return jsonify({
-            'success': True,
-            'clients': machines_data,
-            'total_clients': len(machines_data),
-            'new_transactions': new_transactions,
-            'skipped_duplicates': skipped_duplicates,
-            'updated_machines': len(updated_machines),
-            'total_rows_processed': total_rows,
-            'message': f'✅ Upload concluído! {new_transactions} novas transações adicionadas. Total: {len(machines_data)} máquinas no sistema ({skipped_duplicates} duplicatas ignoradas)'
-        })
+        return jsonify(summary)
         
+    except RequestEntityTooLarge:
+        return jsonify({'success': False, 'error': f"Arquivo maior que o limite de {current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB"}), 413
     except Exception as e:
+        logger.exception("❌ Erro ao processar arquivo")
         db.session.rollback()
         return jsonify({'success': False, 'error': f'Erro ao processar arquivo: {str(e)}'})
 
+@pagbank_bp.route('/import-jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """Retorna o progresso (e o resumo final) de um job de importação"""
+    try:
+        job = load_import_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Job de importação não encontrado'}), 404
+        
+        return jsonify({'success': True, **job.to_dict()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 @pagbank_bp.route('/machines', methods=['GET'])
 def get_machines():
     """Retorna todas as máquinas salvas"""
     try:
-        machines = Machine.query.all()
-        machines_data = [machine.get_summary() for machine in machines]
+        machines_data = Machine.get_summaries()
+        record_rows(len(machines_data))
         
         return jsonify({
             'success': True,
@@ -200,16 +128,15 @@ def get_machines():
 @pagbank_bp.route('/api/client-config/<machine_id>', methods=['GET'])
 def get_client_config(machine_id):
     try:
-        print(f"📋 Carregando configurações para máquina: {machine_id}")
-        config = MachineConfig.query.filter_by(machine_id=machine_id).first()
+        # Lida da memória do worker (ver services.config_cache)
+        config = config_cache.get(machine_id)
         
         if config:
-            print(f"✅ Configuração encontrada para máquina {machine_id}")
             config_dict = config.to_dict()
-            print(f"📊 Dados da configuração: {config_dict}")
+            logger.debug("📊 Configuração da máquina %s: %s", machine_id, config_dict)
             return jsonify(config_dict)
         else:
-            print(f"⚠️ Nenhuma configuração encontrada para máquina {machine_id}, retornando padrão")
+            logger.debug("⚠️ Nenhuma configuração encontrada para máquina %s, retornando padrão", machine_id)
             # Retornar configuração padrão se não existir
             default_config = {
                 'machine_id': machine_id,
@@ -221,7 +148,7 @@ def get_client_config(machine_id):
             }
             return jsonify(default_config)
     except Exception as e:
-        print(f"❌ Erro ao carregar configuração para máquina {machine_id}: {str(e)}")
+        logger.exception("❌ Erro ao carregar configuração para máquina %s", machine_id)
         return jsonify({'success': False, 'error': str(e)})
 
 @pagbank_bp.route('/client-config/<machine_id>', methods=['PUT'])
@@ -229,23 +156,21 @@ def get_client_config(machine_id):
 def save_client_config(machine_id):
     try:
         data = request.get_json()
-        print(f"💾 Salvando configurações para máquina {machine_id}: {data}")
+        logger.debug("💾 Salvando configurações para máquina %s: %s", machine_id, data)
         
         # Buscar ou criar configuração
         config = MachineConfig.query.filter_by(machine_id=machine_id).first()
         
         if not config:
-            print(f"🆕 Criando nova configuração para máquina {machine_id}")
+            logger.info("🆕 Criando nova configuração para máquina %s", machine_id)
             config = MachineConfig(machine_id=machine_id)
             db.session.add(config)
-        else:
-            print(f"🔄 Atualizando configuração existente para máquina {machine_id}")
         
         # Atualizar configuração
         config.update_from_dict(data)
         
         db.session.commit()
-        print(f"✅ Configuração salva com sucesso para máquina {machine_id}")
+        config_cache.invalidate(machine_id)
         
         return jsonify({
             'success': True,
@@ -254,19 +179,41 @@ def save_client_config(machine_id):
         })
         
     except Exception as e:
-        print(f"❌ Erro ao salvar configuração para máquina {machine_id}: {str(e)}")
+        logger.exception("❌ Erro ao salvar configuração para máquina %s", machine_id)
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)})
+
+@pagbank_bp.route('/client-config/bulk', methods=['POST'])
+@pagbank_bp.route('/api/client-config/bulk', methods=['POST'])
+def save_client_configs_bulk():
+    """Mesma tabela, tabela por máquina ou cópia de uma máquina para várias, em uma única transação"""
+    try:
+        try:
+            result = apply_bulk_config(request.get_json(silent=True) or {})
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        db.session.commit()
+        for machine_id in result['gravadas']:
+            config_cache.invalidate(machine_id)
+
+        count('maquinas', result['total_maquinas'])
+        return jsonify(result)
+
+    except Exception as e:
+        logger.exception("❌ Erro ao salvar configurações em lote")
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)})
 @pagbank_bp.route('/transactions/<machine_id>', methods=['GET'])
 @pagbank_bp.route('/api/transactions/<machine_id>', methods=['GET'])
 def get_transactions(machine_id):
+    """Lista paginada (por cursor) das transações da máquina, com filtros e ordenação"""
     try:
-        print(f"🔍 Buscando transações para máquina: {machine_id}")
-        
-        # Buscar transações da máquina
-        transactions = Transaction.query.filter_by(machine_id=machine_id).all()
-        
-        print(f"📊 Encontradas {len(transactions)} transações")
+        try:
+            transactions, next_cursor, page = transactions_page(machine_id, request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
         transactions_data = []
         for transaction in transactions:
@@ -274,115 +221,146 @@ def get_transactions(machine_id):
                 'data_transacao': transaction.data_transacao.isoformat() if transaction.data_transacao else None,
                 'forma_pagamento': transaction.forma_pagamento or '',
                 'parcela': transaction.parcelas or '',  # Usar 'parcelas' do banco
-                'valor_bruto': float(transaction.valor_bruto) if transaction.valor_bruto else 0,
-                'valor_taxa': float(transaction.valor_taxa) if transaction.valor_taxa else 0,
-                'valor_liquido': float(transaction.valor_liquido) if transaction.valor_liquido else 0,
+                'valor_bruto': cents_to_reais(transaction.valor_bruto_centavos),
+                'valor_taxa': cents_to_reais(transaction.valor_taxa_centavos),
+                'valor_liquido': cents_to_reais(transaction.valor_liquido_centavos),
                 'status': transaction.status or '',
                 'codigo_transacao': transaction.codigo_transacao or '',
                 'sua_taxa': 0,  # Será calculado no frontend
                 'seu_lucro': 0  # Será calculado no frontend
             }
             transactions_data.append(transaction_data)
-            
-            if len(transactions_data) <= 3:  # Debug das primeiras 3 transações
-                print(f"📋 Transação {len(transactions_data)}: {transaction_data}")
         
-        print(f"✅ Retornando {len(transactions_data)} transações")
-        return jsonify(transactions_data)
+        record_rows(len(transactions_data))
+        count('transacoes', len(transactions_data))
+        
+        # ?format=columns: uma lista por campo em vez de um objeto por transação
+        extra = {}
+        if request.args.get('format') == 'columns':
+            transactions_data = rows_to_columns(transactions_data)
+            extra['format'] = 'columns'
+        return jsonify({
+            'success': True,
+            'transactions': transactions_data,
+            'next_cursor': next_cursor,
+            **page,
+            **extra
+        })
         
     except Exception as e:
-        print(f"❌ Erro ao buscar transações: {str(e)}")
+        logger.exception("❌ Erro ao buscar transações da máquina %s", machine_id)
         return jsonify({'success': False, 'error': str(e)})
 
-@pagbank_bp.route('/calculate-profit/<machine_id>', methods=['POST'])
-@pagbank_bp.route('/api/calculate-profit/<machine_id>', methods=['POST'])
+@pagbank_bp.route('/calculate-profit/<machine_id>', methods=['GET', 'POST'])
+@pagbank_bp.route('/api/calculate-profit/<machine_id>', methods=['GET', 'POST'])
 def calculate_profit(machine_id):
     try:
-        print(f"🧮 Calculando lucro para máquina: {machine_id}")
-        
         # Buscar máquina e configuração
         machine = Machine.query.filter_by(machine_id=machine_id).first()
         if not machine:
-            print(f"❌ Máquina {machine_id} não encontrada")
+            logger.warning("❌ Máquina %s não encontrada", machine_id)
             return jsonify({'success': False, 'error': 'Máquina não encontrada'})
         
-        config = MachineConfig.query.filter_by(machine_id=machine_id).first()
+        config = config_cache.get(machine_id)
         if not config:
-            print(f"❌ Configuração para máquina {machine_id} não encontrada")
+            logger.warning("❌ Configuração para máquina %s não encontrada", machine_id)
             return jsonify({'success': False, 'error': 'Configuração não encontrada'})
         
-        print(f"📊 Encontradas {len(machine.transactions)} transações")
-        print(f"⚙️ Configuração carregada: 1x={config.credit_1x}%, débito={config.debit_rate}%, pix={config.pix_rate}%")
-        
-        # Calcular lucro para cada transação
-        profit_data = []
-        total_taxa_cliente = 0
-        total_lucro = 0
-        
-        for transaction in machine.transactions:
-            # Determinar taxa do cliente baseada no tipo de pagamento
-            taxa_cliente_percent = 0
+        # ?format=columns: transações em colunas (uma lista por campo), guardado à parte no cache
+        columnar = request.args.get('format') == 'columns'
+        cache_key = f'{machine_id}|columns' if columnar else machine_id
+        
+        # O resultado só muda quando a configuração é salva ou chegam novas transações
+        version = profit_version(machine_id, config)
+        etag = profit_etag(cache_key, version)
+        # Comparação fraca: a resposta comprimida leva a ETag como W/"..."
+        if request.if_none_match.contains_weak(etag):
+            tag('cache', 'etag')
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        payload = profit_cache.get(cache_key, version)
+        if payload is None:
+            # Transações em colunas + vetor de taxas montado uma única vez
+            columns = load_profit_columns(machine_id)
+            rate_vector = build_rate_vector(config)
+            record_rows(len(columns['slot']))
             
-            if transaction.forma_pagamento and 'Crédito' in transaction.forma_pagamento:
-                # Extrair número de parcelas
-                parcelas_str = transaction.parcelas or '1x'
-                if 'x' in parcelas_str:
-                    parcelas_num = parcelas_str.replace('x', '').replace('Parcelado ', '').strip()
-                    # Usar o nome correto do campo (credit_1x em vez de credit_1x)
-                    taxa_attr = f'credit_{parcelas_num}x'
-                    if hasattr(config, taxa_attr):
-                        taxa_cliente_percent = getattr(config, taxa_attr, 0)
-                        print(f"💳 Crédito {parcelas_num}x: {taxa_cliente_percent}%")
-                else:
-                    # Se não tem 'x', assumir 1x
-                    taxa_cliente_percent = config.credit_1x
-                    print(f"💳 Crédito 1x (padrão): {taxa_cliente_percent}%")
-            elif transaction.forma_pagamento and 'Débito' in transaction.forma_pagamento:
-                taxa_cliente_percent = config.debit_rate
-                print(f"💰 Débito: {taxa_cliente_percent}%")
-            elif transaction.forma_pagamento and 'PIX' in transaction.forma_pagamento:
-                taxa_cliente_percent = config.pix_rate
-                print(f"🏦 PIX: {taxa_cliente_percent}%")
-            else:
-                print(f"⚠️ Forma de pagamento não reconhecida: {transaction.forma_pagamento}")
+            count('transacoes', len(columns['slot']))
             
-            # Calcular valores
-            valor_bruto = float(transaction.valor_bruto) if transaction.valor_bruto else 0
-            valor_taxa_pagbank = float(transaction.valor_taxa) if transaction.valor_taxa else 0
-            taxa_cliente_valor = valor_bruto * (taxa_cliente_percent / 100)
-            lucro_transacao = taxa_cliente_valor - valor_taxa_pagbank
+            result = compute_profit(columns, rate_vector, columnar=columnar)
+            payload = f"{current_app.json.dumps(result)}\n".encode('utf-8')
+            profit_cache.set(cache_key, version, payload)
             
-            total_taxa_cliente += taxa_cliente_valor
-            total_lucro += lucro_transacao
-            
-            profit_data.append({
-                'codigo_transacao': transaction.codigo_transacao,
-                'data_transacao': transaction.data_transacao.isoformat() if transaction.data_transacao else None,
-                'forma_pagamento': transaction.forma_pagamento,
-                'parcela': transaction.parcelas,
-                'valor_bruto': valor_bruto,
-                'valor_taxa': valor_taxa_pagbank,
-                'sua_taxa': taxa_cliente_valor,
-                'seu_lucro': lucro_transacao,
-                'taxa_cliente_percent': taxa_cliente_percent
-            })
+            tag('cache', 'miss')
+            logger.debug("✅ Lucro da máquina %s: taxa cliente total=R$%.2f, lucro total=R$%.2f",
+                         machine_id, result['suas_taxas_total'], result['lucro_total'])
+        else:
+            tag('cache', 'hit')
         
-        print(f"✅ Cálculo concluído: Taxa cliente total=R${total_taxa_cliente:.2f}, Lucro total=R${total_lucro:.2f}")
-        
-        return jsonify({
-            'success': True,
-            'suas_taxas_total': total_taxa_cliente,
-            'lucro_total': total_lucro,
-            'margem_lucro': (total_lucro / total_taxa_cliente * 100) if total_taxa_cliente > 0 else 0,
-            'transactions': profit_data
-        })
+        response = current_app.response_class(payload, mimetype='application/json')
+        response.set_etag(etag)
+        # Sempre revalidar com If-None-Match antes de reutilizar
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except Exception as e:
-        print(f"❌ Erro ao calcular lucro: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Erro ao calcular lucro da máquina %s", machine_id)
         return jsonify({'success': False, 'error': f'Erro interno: {str(e)}'})
 
+@pagbank_bp.route('/reports', methods=['GET'])
+def get_report():
+    """Receita, taxas e lucro por dia/semana/mês, opcionalmente por máquina, forma de pagamento ou parcelas"""
+    try:
+        try:
+            report = revenue_report(request.args)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        count('periodos', len(report['buckets']))
+        return jsonify(report)
+        
+    except Exception as e:
+        logger.exception("❌ Erro ao gerar relatório")
+        return jsonify({'success': False, 'error': str(e)})
+
+@pagbank_bp.route('/simulate-rates', methods=['POST'])
+def simulate_client_rates():
+    """Projeta taxa do cliente e lucro de tabelas de taxas candidatas, sem salvar configurações"""
+    try:
+        try:
+            result = simulate_rates(request.get_json(silent=True) or {})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        count('cenarios', len(result['cenarios']))
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.exception("❌ Erro ao simular taxas")
+        return jsonify({'success': False, 'error': str(e)})
+
+@pagbank_bp.route('/export-data', methods=['GET'])
+def export_machines():
+    """Exportação em streaming (NDJSON ou CSV) de várias máquinas no mesmo arquivo"""
+    machine_ids = request.args.get('machines')
+    machine_ids = [m.strip() for m in machine_ids.split(',') if m.strip()] if machine_ids else None
+    return _streaming_export(machine_ids, request.args.get('format', 'ndjson'), 'maquinas_export')
+
+def _streaming_export(machine_ids, export_format, basename):
+    if export_format == 'csv':
+        body, mimetype, extension = iter_csv(machine_ids), 'text/csv; charset=utf-8', 'csv'
+    elif export_format == 'ndjson':
+        body, mimetype, extension = iter_ndjson(machine_ids), 'application/x-ndjson', 'ndjson'
+    else:
+        return jsonify({'success': False, 'error': f'Formato de exportação inválido: {export_format}'}), 400
+    
+    # Resposta em partes (chunked): as linhas são geradas enquanto o cursor do banco avança
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{basename}.{extension}"'
+    return response
+
 @pagbank_bp.route('/export-data/<machine_id>', methods=['GET'])
 def export_data(machine_id):
     try:
@@ -390,6 +368,11 @@ def export_data(machine_id):
         if not machine:
             return jsonify({'success': False, 'error': 'Máquina não encontrada'})
         
+        # ?format=ndjson ou ?format=csv: exportação em streaming com memória constante
+        export_format = request.args.get('format', 'json')
+        if export_format != 'json':
+            return _streaming_export([machine_id], export_format, f'machine_{machine_id}_export')
+        
         # Preparar dados para exportação
         export_data = {
             'machine_info': machine.to_dict(),
@@ -397,6 +380,7 @@ def export_data(machine_id):
             'transactions': [t.to_dict() for t in machine.transactions],
             'summary': machine.get_summary()
         }
+        record_rows(len(export_data['transactions']))
         
         return jsonify({
             'success': True,
@@ -413,6 +397,8 @@ def clear_test_data():
     try:
         # Remover máquinas de teste
         test_machines = ['9999999999', '8888888888']
+        # Totais consolidados antes das máquinas (chave estrangeira para machines)
+        remove_machine_summaries(test_machines)
         for machine_id in test_machines:
             # Remover transações da máquina
             Transaction.query.filter_by(machine_id=machine_id).delete()
@@ -421,6 +407,12 @@ def clear_test_data():
             # Remover máquina
             Machine.query.filter_by(machine_id=machine_id).delete()
         
+        # Remover resultados em cache das máquinas de teste
+        for machine_id in test_machines:
+            profit_cache.invalidate(machine_id)
+            profit_cache.invalidate(f'{machine_id}|columns')
+            config_cache.invalidate(machine_id)
+        
         db.session.commit()
         return jsonify({'success': True, 'message': 'Dados de teste removidos com sucesso'})
     except Exception as e:
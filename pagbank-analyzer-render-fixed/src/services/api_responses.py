@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele o JSON sai pelo módulo json do Flask
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele as respostas usam só gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compressão das respostas da API (JSON, NDJSON e CSV) conforme o Accept-Encoding.
+# Respostas menores que o limite saem sem compressão; exportações em streaming são
+# comprimidas bloco a bloco, sem montar o arquivo inteiro em memória.
+API_COMPRESS_MIN_BYTES = int(os.environ.get('API_COMPRESS_MIN_BYTES', '1024'))
+API_GZIP_LEVEL = int(os.environ.get('API_GZIP_LEVEL', '6'))
+API_BROTLI_QUALITY = int(os.environ.get('API_BROTLI_QUALITY', '4'))
+# Respostas com ETag forte (ex.: /calculate-profit) têm a versão comprimida guardada por
+# (ETag, codificação): repetir a mesma resposta não comprime de novo
+API_COMPRESS_CACHE_MAX_BYTES = int(os.environ.get('API_COMPRESS_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv'}
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Mesmo JSON do provedor padrão do Flask (chaves ordenadas, datas no formato HTTP), gerado pelo orjson"""
+
+    if orjson is not None:
+        OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps_bytes(self, obj):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self.OPTIONS)
+        except TypeError:
+            # Inteiros fora de 64 bits e afins: deixar com o módulo json
+            return super().dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+class _CompressedCache:
+    """LRU das respostas já comprimidas, limitado em bytes"""
+
+    def __init__(self, max_bytes=API_COMPRESS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+_compressed_cache = _CompressedCache()
+
+def rows_to_columns(rows):
+    """Lista de objetos -> um array por campo (formato ?format=columns)"""
+    if not rows:
+        return {}
+    return {field: [row[field] for row in rows] for field in rows[0]}
+
+def _accepted_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] > 0:
+        return 'br'
+    if accepted['gzip'] > 0:
+        return 'gzip'
+    return None
+
+def _compressor(encoding):
+    """(comprimir bloco, finalizar) para a codificação"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=API_BROTLI_QUALITY)
+        return (lambda data: compressor.process(data) + compressor.flush()), compressor.finish
+    compressor = zlib.compressobj(API_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 = cabeçalho gzip
+    return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=API_BROTLI_QUALITY)
+    compressor = zlib.compressobj(API_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def _compress_stream(chunks, encoding):
+    compress, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compress(chunk)
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def compress_response(response):
+    """Comprime respostas da API acima de API_COMPRESS_MIN_BYTES com br ou gzip"""
+    if (response.status_code != 200 or request.method == 'HEAD'
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    if response.is_streamed:
+        response.vary.add('Accept-Encoding')
+        encoding = _accepted_encoding()
+        if encoding is None:
+            return response
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < API_COMPRESS_MIN_BYTES:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = _accepted_encoding()
+        if encoding is None:
+            return response
+        etag, weak = response.get_etag()
+        key = (etag, encoding) if etag and not weak else None
+        compressed = _compressed_cache.get(key) if key else None
+        if compressed is None:
+            compressed = _compress(data, encoding)
+            if key:
+                _compressed_cache.set(key, compressed)
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    # O corpo mudou de representação: a ETag passa a valer só para comparação fraca
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_api_responses(app):
+    """JSON pelo orjson (se instalado) e compressão das respostas da API"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
+    logger.debug("🗜️ Respostas da API: JSON %s, compressão %s", 'orjson' if orjson is not None else 'json',
+                 'br/gzip' if brotli is not None else 'gzip')
@@ -0,0 +1,169 @@
+import logging
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.machine import Machine, MachineConfig
+from src.models.rate_schedule import CONFIG_FIELDS, SCHEDULE_COLUMNS, SCHEDULE_SIZE, RateSchedule
+
+logger = logging.getLogger(__name__)
+
+# Configuração de taxas de várias máquinas em uma única transação:
+#   {"rates": {...}, "machines": [...]}       mesma tabela para todas (campos omitidos mantêm a taxa de cada uma)
+#   {"configs": {"<machine_id>": {...}}}      tabela própria por máquina
+#   {"copy_from": "<machine_id>", "machines": [...]}  copia a tabela inteira de uma máquina para o grupo
+# "machines": "all" seleciona todas as máquinas cadastradas; "dry_run": true só devolve o que mudaria.
+
+MAX_BULK_MACHINES = 5000
+
+EMPTY_SCHEDULE = RateSchedule([0.0] * SCHEDULE_SIZE)
+
+def _target_machines(data, default=None):
+    machines = data.get('machines', default)
+    if machines == 'all':
+        return list(db.session.scalars(select(Machine.machine_id).order_by(Machine.id)))
+    if not isinstance(machines, list) or not machines:
+        raise ValueError('Informe as máquinas em "machines" (lista de máquinas ou "all")')
+    # Sem repetições, na ordem recebida
+    return list(dict.fromkeys(str(machine_id) for machine_id in machines))
+
+def _check_machines_exist(machine_ids):
+    existing = set(db.session.scalars(select(Machine.machine_id).where(Machine.machine_id.in_(machine_ids))))
+    missing = [machine_id for machine_id in machine_ids if machine_id not in existing]
+    if missing:
+        shown = ', '.join(missing[:10]) + (' ...' if len(missing) > 10 else '')
+        raise ValueError(f'Máquinas não encontradas ({len(missing)}): {shown}')
+
+def load_schedules(machine_ids):
+    """Tabela de taxas atual de cada máquina que já tem configuração"""
+    columns = [MachineConfig.__table__.c[column] for column in SCHEDULE_COLUMNS]
+    rows = db.session.execute(
+        select(MachineConfig.machine_id, *columns).where(MachineConfig.machine_id.in_(machine_ids))
+    )
+    return {row[0]: RateSchedule(row[1:]) for row in rows}
+
+def _updated(schedule, rates, machine_id):
+    if not isinstance(rates, dict):
+        raise ValueError(f'Taxas da máquina {machine_id} devem ser um objeto')
+    try:
+        return schedule.updated(rates)
+    except (TypeError, ValueError):
+        raise ValueError(f'Taxa inválida na configuração da máquina {machine_id}')
+
+def _changes(before, after):
+    """Campos alterados: {campo: {'antes': ..., 'depois': ...}}"""
+    before, after = before.to_config_dict(), after.to_config_dict()
+    return {
+        field: {'antes': before[field], 'depois': after[field]}
+        for field in CONFIG_FIELDS if before[field] != after[field]
+    }
+
+def _upsert_configs(schedules, now):
+    """INSERT ... ON CONFLICT (machine_id) DO UPDATE com as novas tabelas de taxas"""
+    rows = [
+        {'machine_id': machine_id, **schedule.to_columns_dict(), 'updated_at': now}
+        for machine_id, schedule in schedules.items()
+    ]
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(MachineConfig)
+        set_ = {column: stmt.excluded[column] for column in SCHEDULE_COLUMNS + ('updated_at',)}
+        stmt = stmt.on_conflict_do_update(index_elements=['machine_id'], set_=set_)
+        db.session.execute(stmt, rows)
+        return
+
+    # Outros bancos: atualizar as existentes e inserir as novas
+    existing = {
+        config.machine_id: config
+        for config in MachineConfig.query.filter(MachineConfig.machine_id.in_(list(schedules)))
+    }
+    new_rows = []
+    for row in rows:
+        config = existing.get(row['machine_id'])
+        if config is None:
+            new_rows.append(row)
+        else:
+            schedules[row['machine_id']].apply_to(config)
+            config.updated_at = now
+    if new_rows:
+        db.session.execute(insert(MachineConfig), new_rows)
+    db.session.flush()
+
+def apply_bulk_config(data):
+    """Aplica tabelas de taxas a várias máquinas e informa o que mudou em cada uma"""
+    modes = [key for key in ('rates', 'configs', 'copy_from') if data.get(key) is not None]
+    if len(modes) != 1:
+        raise ValueError('Informe exatamente um de "rates", "configs" ou "copy_from"')
+    mode = modes[0]
+
+    source = None
+    if mode == 'configs':
+        configs = data['configs']
+        if not isinstance(configs, dict) or not configs:
+            raise ValueError('"configs" deve mapear máquina -> taxas')
+        configs = {str(machine_id): rates for machine_id, rates in configs.items()}
+        machine_ids = _target_machines(data, default=list(configs))
+    else:
+        machine_ids = _target_machines(data)
+        if mode == 'copy_from':
+            source = str(data['copy_from'])
+            machine_ids = [machine_id for machine_id in machine_ids if machine_id != source]
+            if not machine_ids:
+                raise ValueError('Nenhuma máquina de destino além da máquina de origem')
+
+    if len(machine_ids) > MAX_BULK_MACHINES:
+        raise ValueError(f'No máximo {MAX_BULK_MACHINES} máquinas por requisição')
+    _check_machines_exist(machine_ids)
+
+    current = load_schedules(machine_ids + ([source] if source else []))
+    if source is not None:
+        if source not in current:
+            raise ValueError(f'Máquina de origem {source} não tem configuração salva')
+        source_schedule = current[source]
+
+    results = []
+    to_save = {}
+    for machine_id in machine_ids:
+        before = current.get(machine_id)
+        base = before or EMPTY_SCHEDULE
+        if mode == 'rates':
+            after = _updated(base, data['rates'], machine_id)
+        elif mode == 'configs':
+            if machine_id not in configs:
+                raise ValueError(f'Máquina {machine_id} sem taxas em "configs"')
+            after = _updated(base, configs[machine_id], machine_id)
+        else:
+            after = source_schedule
+
+        if before is None:
+            status = 'criada'
+        elif after != before:
+            status = 'atualizada'
+        else:
+            status = 'inalterada'
+        if status != 'inalterada':
+            to_save[machine_id] = after
+        results.append({'machine_id': machine_id, 'status': status, 'alteracoes': _changes(base, after)})
+
+    # Gravação sem commit: a rota confirma e invalida o cache de configurações
+    dry_run = bool(data.get('dry_run'))
+    if not dry_run and to_save:
+        _upsert_configs(to_save, datetime.utcnow())
+        logger.info("💾 Configuração em lote (%s): %d máquinas gravadas", mode, len(to_save))
+
+    statuses = [result['status'] for result in results]
+    return {
+        'success': True,
+        'modo': mode,
+        'dry_run': dry_run,
+        'copy_from': source,
+        'total_maquinas': len(results),
+        'criadas': statuses.count('criada'),
+        'atualizadas': statuses.count('atualizada'),
+        'inalteradas': statuses.count('inalterada'),
+        'maquinas': results,
+        'gravadas': [] if dry_run else list(to_save)
+    }
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from sqlalchemy import select
+from src.models.user import db
+from src.models.machine import MachineConfig
+
+# Segundos em que uma configuração em memória é usada sem consultar o banco. Depois disso
+# só o updated_at é conferido (a tabela completa só é relida se mudou). Salvar no próprio
+# worker invalida na hora; alterações feitas por outro worker aparecem em até esse tempo.
+CONFIG_CACHE_TTL = float(os.environ.get('CONFIG_CACHE_TTL', '5'))
+
+class CachedConfig:
+    """Configuração de taxas de uma máquina, como lida do banco"""
+
+    __slots__ = ('machine_id', 'rate_schedule', 'created_at', 'updated_at', 'checked_at')
+
+    def __init__(self, config):
+        self.machine_id = config.machine_id
+        self.rate_schedule = config.rate_schedule
+        self.created_at = config.created_at
+        self.updated_at = config.updated_at
+        self.checked_at = time.monotonic()
+
+    def to_dict(self):
+        """Mesmo formato de MachineConfig.to_dict"""
+        return {
+            'machine_id': self.machine_id,
+            **self.rate_schedule.to_config_dict(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ConfigCache:
+    """Cache por worker das configurações de taxas, por machine_id e updated_at"""
+
+    def __init__(self, ttl=CONFIG_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, machine_id):
+        """Configuração da máquina (None se não existir)"""
+        with self._lock:
+            entry = self._entries.get(machine_id)
+        if entry is not None:
+            if time.monotonic() - entry.checked_at < self.ttl:
+                return entry
+            # Vencida: reaproveitar se o updated_at no banco não mudou
+            updated_at = db.session.scalar(
+                select(MachineConfig.updated_at).where(MachineConfig.machine_id == machine_id)
+            )
+            if updated_at is not None and updated_at == entry.updated_at:
+                entry.checked_at = time.monotonic()
+                return entry
+
+        config = MachineConfig.query.filter_by(machine_id=machine_id).first()
+        if config is None:
+            self.invalidate(machine_id)
+            return None
+        return self.set(config)
+
+    def set(self, config):
+        entry = CachedConfig(config)
+        with self._lock:
+            self._entries[config.machine_id] = entry
+        return entry
+
+    def invalidate(self, machine_id):
+        with self._lock:
+            self._entries.pop(machine_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+config_cache = ConfigCache()
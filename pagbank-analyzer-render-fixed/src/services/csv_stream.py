@@ -0,0 +1,69 @@
+import codecs
+import csv
+import io
+
+# Bytes lidos do início do arquivo para detectar a codificação
+SNIFF_SIZE = 64 * 1024
+
+# Linhas entregues por vez para a camada de gravação
+CHUNK_ROWS = 1000
+
+class _ReplayStream(io.RawIOBase):
+    """Stream binário que devolve primeiro os bytes já lidos e depois o restante do arquivo"""
+
+    def __init__(self, head, stream):
+        self._head = head
+        self._pos = 0
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._pos < len(self._head):
+            data = self._head[self._pos:self._pos + len(buffer)]
+            self._pos += len(data)
+        else:
+            data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def detect_encoding(head):
+    """Detecta a codificação do extrato a partir dos primeiros bytes"""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False tolera um caractere multibyte cortado no fim do bloco
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        head.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        # Bytes indefinidos no cp1252 (0x81, 0x8D...) - latin-1 aceita qualquer byte
+        return 'latin-1'
+
+def open_csv_text(stream):
+    """Envolve um stream binário em um leitor de texto com a codificação detectada"""
+    head = stream.read(SNIFF_SIZE)
+    encoding = detect_encoding(head)
+    raw = io.BufferedReader(_ReplayStream(head, stream))
+    return io.TextIOWrapper(raw, encoding=encoding, newline=''), encoding
+
+def iter_csv_rows(stream):
+    """Lê o extrato (delimitado por ';') linha a linha, sem carregar o arquivo inteiro"""
+    text, _ = open_csv_text(stream)
+    return csv.DictReader(text, delimiter=';')
+
+def iter_row_chunks(rows, size=CHUNK_ROWS):
+    """Agrupa um iterável de linhas em listas de tamanho fixo"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
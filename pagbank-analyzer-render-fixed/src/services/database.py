@@ -0,0 +1,153 @@
+import logging
+import os
+from flask import jsonify
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from src.models.user import db
+from src.services.instrumentation import PERF_INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+# Banco padrão quando DATABASE_URL não está definido (desenvolvimento / disco do Render)
+DEFAULT_DATABASE_URI = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'app.db')}"
+
+# SQLite: WAL deixa as leituras dos outros workers seguirem durante um upload;
+# synchronous=NORMAL é seguro com WAL (só a última transação pode se perder numa queda de energia)
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+# Cache de páginas por conexão, em KiB
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', str(32 * 1024)))
+# Arquivo mapeado em memória, em bytes (0 desliga)
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+# Espera por um lock de escrita antes de falhar com "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+# PostgreSQL: pool de conexões por worker do gunicorn
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+# Reabrir conexões antigas antes que o servidor/proxy as derrube
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+# Limites por comando no servidor (0 desliga)
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '60000'))
+DB_LOCK_TIMEOUT_MS = int(os.environ.get('DB_LOCK_TIMEOUT_MS', '10000'))
+
+_SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout')
+_POSTGRES_SETTINGS = ('statement_timeout', 'lock_timeout', 'server_version')
+
+def database_uri():
+    """URI do banco: DATABASE_URL quando for uma URL de banco, senão o SQLite local"""
+    url = os.environ.get('DATABASE_URL', '').strip()
+    if '://' not in url:
+        if url:
+            logger.warning("⚠️ DATABASE_URL não é uma URL de banco; usando SQLite local")
+        return DEFAULT_DATABASE_URI
+    # Render/Heroku ainda entregam o esquema antigo, que o SQLAlchemy 2 não aceita
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def _is_memory_sqlite(url):
+    return url.database in (None, '', ':memory:') or url.database.startswith('file::memory:')
+
+def engine_options(uri):
+    """Opções do create_engine para o dialeto da URI"""
+    url = make_url(uri)
+    if url.get_backend_name() == 'postgresql':
+        options = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'pool_pre_ping': DB_POOL_PRE_PING,
+        }
+        server_options = []
+        if DB_STATEMENT_TIMEOUT_MS:
+            server_options.append(f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}')
+        if DB_LOCK_TIMEOUT_MS:
+            server_options.append(f'-c lock_timeout={DB_LOCK_TIMEOUT_MS}')
+        if server_options:
+            options['connect_args'] = {'options': ' '.join(server_options)}
+        return options
+    if url.get_backend_name() == 'sqlite':
+        # Timeout do driver coerente com o busy_timeout aplicado na conexão
+        return {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {}
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute(f'PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}')
+        cursor.execute(f'PRAGMA synchronous = {SQLITE_SYNCHRONOUS}')
+        # Valor negativo = tamanho em KiB (positivo seria em páginas)
+        cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}')
+        cursor.execute(f'PRAGMA mmap_size = {SQLITE_MMAP_SIZE}')
+    finally:
+        cursor.close()
+
+def configure_database(app, uri=None):
+    """Configura a URI e o engine (pragmas do SQLite / pool do PostgreSQL) e inicializa o db"""
+    uri = uri or database_uri()
+    if uri == DEFAULT_DATABASE_URI:
+        # O SQLite cria o arquivo, mas não a pasta
+        os.makedirs(os.path.dirname(make_url(uri).database), exist_ok=True)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == 'sqlite' and not _is_memory_sqlite(engine.url):
+            event.listen(engine, 'connect', _sqlite_on_connect)
+        logger.info("🗄️ Banco: %s", engine.url.render_as_string(hide_password=True))
+    # Expõe URL, pool e ajustes do banco: só junto com /api/metrics (PERF_INSTRUMENTATION=1)
+    if PERF_INSTRUMENTATION:
+        app.add_url_rule('/api/diagnostics/database', 'database_diagnostics', database_diagnostics, methods=['GET'])
+
+def database_settings():
+    """Configuração pedida (variáveis de ambiente) para o dialeto em uso"""
+    if db.engine.dialect.name == 'sqlite':
+        return {
+            'journal_mode': SQLITE_JOURNAL_MODE,
+            'synchronous': SQLITE_SYNCHRONOUS,
+            'cache_size_kb': SQLITE_CACHE_SIZE_KB,
+            'mmap_size': SQLITE_MMAP_SIZE,
+            'busy_timeout_ms': SQLITE_BUSY_TIMEOUT_MS,
+        }
+    options = engine_options(db.engine.url)
+    options.pop('connect_args', None)
+    options['statement_timeout_ms'] = DB_STATEMENT_TIMEOUT_MS
+    options['lock_timeout_ms'] = DB_LOCK_TIMEOUT_MS
+    return options
+
+def database_status():
+    """Valores efetivos lidos do banco e estado do pool"""
+    engine = db.engine
+    status = {
+        'dialect': engine.dialect.name,
+        'driver': engine.driver,
+        'url': engine.url.render_as_string(hide_password=True),
+        'settings': database_settings(),
+        'pool': {'class': type(engine.pool).__name__, 'status': engine.pool.status()},
+    }
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            status['effective'] = {
+                pragma: conn.exec_driver_sql(f'PRAGMA {pragma}').scalar() for pragma in _SQLITE_PRAGMAS
+            }
+            status['server_version'] = conn.exec_driver_sql('SELECT sqlite_version()').scalar()
+        elif engine.dialect.name == 'postgresql':
+            status['effective'] = {
+                setting: conn.execute(text(f'SHOW {setting}')).scalar() for setting in _POSTGRES_SETTINGS
+            }
+    return status
+
+def database_diagnostics():
+    try:
+        return jsonify({'success': True, **database_status()})
+    except Exception as e:
+        logger.error("❌ Erro ao ler diagnóstico do banco: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
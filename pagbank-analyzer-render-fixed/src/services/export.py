@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from src.models.user import db
+from src.models.machine import Machine, Transaction
+from src.services.instrumentation import record_rows
+from src.services.ingest import (
+    COL_BANDEIRA, COL_CODIGO, COL_DATA, COL_EMAIL_CLIENTE, COL_FORMA_PAGAMENTO, COL_MAQUINA,
+    COL_NOME_CLIENTE, COL_PARCELA, COL_STATUS, COL_VALOR_BRUTO, COL_VALOR_LIQUIDO
+)
+from src.services.money import format_brazilian_cents
+
+# Transações lidas do cursor do banco por vez
+EXPORT_YIELD_PER = 1000
+
+# Mesmo layout de colunas do extrato PagBank (o arquivo pode ser reimportado)
+CSV_COLUMNS = [
+    COL_MAQUINA, COL_CODIGO, COL_DATA, COL_BANDEIRA, COL_FORMA_PAGAMENTO, COL_PARCELA,
+    COL_VALOR_BRUTO, COL_VALOR_LIQUIDO, COL_STATUS, COL_NOME_CLIENTE, COL_EMAIL_CLIENTE
+]
+
+def _machines(machine_ids):
+    query = Machine.query.order_by(Machine.id)
+    if machine_ids is not None:
+        query = query.filter(Machine.machine_id.in_(machine_ids))
+    return query.all()
+
+def _transactions(machine_id):
+    """Transações da máquina lidas em blocos a partir de um cursor do servidor"""
+    stmt = (
+        select(Transaction)
+        .where(Transaction.machine_id == machine_id)
+        .order_by(Transaction.id)
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+    for partition in db.session.scalars(stmt).partitions():
+        record_rows(len(partition))
+        yield from partition
+        # Liberar os objetos já enviados para manter a memória constante
+        for transaction in partition:
+            db.session.expunge(transaction)
+
+def iter_ndjson(machine_ids=None):
+    """Uma linha JSON por máquina (dados, configuração e resumo) seguida das suas transações"""
+    for machine in _machines(machine_ids):
+        header = {
+            'type': 'machine',
+            'machine_info': machine.to_dict(),
+            'config': machine.config.to_dict() if machine.config else None,
+            'summary': machine.get_summary()
+        }
+        machine_id = machine.machine_id
+        yield json.dumps(header, ensure_ascii=False) + '\n'
+        lines = []
+        for transaction in _transactions(machine_id):
+            lines.append(json.dumps({'type': 'transaction', **transaction.to_dict()}, ensure_ascii=False))
+            if len(lines) >= EXPORT_YIELD_PER:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+        if lines:
+            yield '\n'.join(lines) + '\n'
+
+def iter_csv(machine_ids=None):
+    """CSV delimitado por ';' no layout do extrato PagBank"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow(CSV_COLUMNS)
+
+    for machine in _machines(machine_ids):
+        machine_id, client_name, client_email = machine.machine_id, machine.client_name, machine.client_email
+        for transaction in _transactions(machine_id):
+            writer.writerow([
+                machine_id,
+                transaction.codigo_transacao,
+                transaction.data_transacao.strftime('%d/%m/%Y %H:%M') if transaction.data_transacao else '',
+                transaction.bandeira or '',
+                transaction.forma_pagamento or '',
+                transaction.parcelas or '',
+                format_brazilian_cents(transaction.valor_bruto_centavos),
+                format_brazilian_cents(transaction.valor_liquido_centavos),
+                transaction.status or '',
+                client_name or '',
+                client_email or ''
+            ])
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.import_job import ImportJob
+from src.services.csv_stream import iter_csv_rows
+from src.services.ingest import BulkImporter, upload_summary
+
+logger = logging.getLogger(__name__)
+
+# Threads por worker do gunicorn dedicadas às importações
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', '2'))
+
+# Jobs pendentes ou em execução sem atualização há mais que isso (worker reiniciado ou
+# encerrado no meio da importação) passam a 'error' ao serem consultados
+IMPORT_JOB_STALE_SECONDS = int(os.environ.get('IMPORT_JOB_STALE_SECONDS', '600'))
+
+_executor = None
+_executor_pid = None
+# Jobs na fila deste processo: também têm updated_at renovado enquanto esperam
+_queued = set()
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Após um fork as threads do executor ficam no processo pai: criar outro
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix='import-job')
+            _executor_pid = os.getpid()
+            _queued.clear()
+        return _executor
+
+def enqueue_import(app, file, strict=False):
+    """Salva o arquivo enviado em disco, registra o job e agenda a importação"""
+    job_id = uuid.uuid4().hex
+
+    # O upload deixa de existir ao fim da requisição - manter uma cópia temporária
+    fd, path = tempfile.mkstemp(prefix=f'import-{job_id}-', suffix='.csv')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            file.save(target)
+
+        job = ImportJob(id=job_id, filename=file.filename, status='pending')
+        db.session.add(job)
+        db.session.commit()
+
+        executor = _get_executor()
+        with _executor_lock:
+            _queued.add(job_id)
+        executor.submit(_run_import, app, job_id, path, strict)
+    except Exception:
+        # Sem job agendado ninguém apaga a cópia: removê-la antes de propagar o erro
+        db.session.rollback()
+        with _executor_lock:
+            _queued.discard(job_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return job
+
+def load_import_job(job_id):
+    """Job pelo id; pendente ou em execução sem sinal de vida há IMPORT_JOB_STALE_SECONDS vira 'error'"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.status not in ('pending', 'running'):
+        return job
+    if job.updated_at and job.updated_at < datetime.utcnow() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS):
+        logger.warning("⚠️ Job de importação %s sem atualização desde %s: marcado como interrompido", job_id, job.updated_at)
+        job.status = 'error'
+        job.error_message = ('Importação interrompida (o servidor reiniciou durante o processamento). '
+                             'Envie o arquivo novamente: as transações já gravadas serão ignoradas.')
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    return job
+
+def _touch_queued():
+    """Renova updated_at dos jobs que ainda esperam na fila deste processo"""
+    with _executor_lock:
+        waiting = list(_queued)
+    if waiting:
+        ImportJob.query.filter(ImportJob.id.in_(waiting), ImportJob.status == 'pending').update(
+            {ImportJob.updated_at: datetime.utcnow()}, synchronize_session=False)
+
+def _run_import(app, job_id, path, strict=False):
+    with app.app_context():
+        try:
+            with _executor_lock:
+                _queued.discard(job_id)
+            job = db.session.get(ImportJob, job_id)
+            job.status = 'running'
+            db.session.commit()
+            last_touch = time.monotonic()
+
+            def report_progress(importer):
+                nonlocal last_touch
+                # Cada lote é confirmado junto com o progresso; reenviar o arquivo
+                # após uma falha apenas pula as transações já gravadas
+                job.rows_parsed = importer.total_rows
+                job.rows_inserted = importer.new_transactions
+                job.duplicates_skipped = importer.skipped_duplicates
+                job.errors = importer.invalid_rows
+                # updated_at serve de sinal de vida (ver load_import_job)
+                job.updated_at = datetime.utcnow()
+                if time.monotonic() - last_touch > IMPORT_JOB_STALE_SECONDS / 4:
+                    _touch_queued()
+                    last_touch = time.monotonic()
+                db.session.commit()
+
+            importer = BulkImporter(on_chunk=report_progress, strict=strict)
+            with open(path, 'rb') as stream:
+                importer.import_rows(iter_csv_rows(stream))
+
+            job.result = json.dumps(upload_summary(importer))
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.info("✅ Job de importação %s concluído: linhas=%d novas=%d duplicadas=%d",
+                        job_id, importer.total_rows, importer.new_transactions, importer.skipped_duplicates)
+        except Exception as e:
+            logger.exception("❌ Erro no job de importação %s", job_id)
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            if job:
+                job.status = 'error'
+                job.error_message = f'Erro ao processar arquivo: {str(e)}'
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+        finally:
+            db.session.remove()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,336 @@
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.machine import Machine, MachineConfig, Transaction
+from src.services.csv_stream import iter_row_chunks
+from src.services.money import cents_to_reais
+from src.services.parsing import MalformedCell, parse_amount_cents, parse_date
+from src.services.pg_copy import ANALYZE_AFTER_ROWS, copy_merge_batch, refresh_statistics, supports_copy
+from src.services.profit import classify_payment
+from src.services.summaries import apply_summary_deltas
+
+# Quantidade de linhas do CSV gravadas por lote
+BATCH_SIZE = 1000
+
+# Limite de parâmetros por cláusula IN (SQLite antigo aceita no máximo 999)
+IN_CHUNK_SIZE = 500
+
+# Células malformadas detalhadas na resposta do upload (as demais só entram na contagem)
+MAX_PARSE_ISSUES = 20
+
+# Colunas do extrato PagBank
+COL_MAQUINA = 'Identificação da Maquininha'
+COL_CODIGO = 'Código da Transação'
+COL_DATA = 'Data da Transação'
+COL_BANDEIRA = 'Bandeira'
+COL_FORMA_PAGAMENTO = 'Forma de Pagamento'
+COL_PARCELA = 'Parcela'
+COL_VALOR_BRUTO = 'Valor Bruto'
+COL_VALOR_LIQUIDO = 'Valor Líquido'
+COL_STATUS = 'Status'
+COL_NOME_CLIENTE = 'Nome Cliente'
+COL_EMAIL_CLIENTE = 'E-mail Cliente'
+
+TRANSACTION_FIELDS = (
+    'machine_id', 'codigo_transacao', 'data_transacao', 'forma_pagamento',
+    'parcelas', 'tipo_pagamento', 'num_parcelas', 'valor_bruto_centavos', 'valor_taxa_centavos',
+    'valor_liquido_centavos', 'valor_bruto', 'valor_taxa', 'valor_liquido', 'status'
+)
+
+def _parse_cell(parser, row, column, strict, report):
+    """Converte uma célula; malformada é reportada e vira o valor padrão (ou rejeita a linha no modo estrito)"""
+    value = row.get(column)
+    try:
+        return parser(value, strict=True)
+    except MalformedCell:
+        if report is not None:
+            report(column, value)
+        if strict:
+            raise
+        return parser(value)
+
+def normalize_row(row, strict=False, report=None):
+    """Converte uma linha do CSV no registro usado pela importação (None se inválida)
+
+    report(coluna, valor) é chamado para cada célula malformada. No modo estrito
+    qualquer célula malformada invalida a linha; no tolerante só a data é obrigatória.
+    """
+    machine_id = (row.get(COL_MAQUINA) or '').strip()
+    codigo_transacao = (row.get(COL_CODIGO) or '').strip()
+    if not machine_id or not codigo_transacao:
+        return None
+
+    try:
+        data_transacao = _parse_cell(parse_date, row, COL_DATA, True, report)
+        # Valores em centavos; taxa PagBank = diferença exata entre bruto e líquido
+        valor_bruto = _parse_cell(parse_amount_cents, row, COL_VALOR_BRUTO, strict, report)
+        valor_liquido = _parse_cell(parse_amount_cents, row, COL_VALOR_LIQUIDO, strict, report)
+    except MalformedCell:
+        return None
+    if data_transacao is None:
+        # Data vazia: a transação não pode ser gravada
+        if report is not None:
+            report(COL_DATA, row.get(COL_DATA))
+        return None
+    valor_taxa = valor_bruto - valor_liquido
+
+    forma_pagamento = (row.get(COL_FORMA_PAGAMENTO) or '').strip()
+    parcelas = (row.get(COL_PARCELA) or '').strip()
+    tipo_pagamento, num_parcelas = classify_payment(forma_pagamento, parcelas)
+
+    return {
+        'machine_id': machine_id,
+        'codigo_transacao': codigo_transacao,
+        'data_transacao': data_transacao,
+        'forma_pagamento': forma_pagamento,
+        'parcelas': parcelas,
+        'tipo_pagamento': tipo_pagamento,
+        'num_parcelas': num_parcelas,
+        'valor_bruto_centavos': valor_bruto,
+        'valor_taxa_centavos': valor_taxa,
+        'valor_liquido_centavos': valor_liquido,
+        # Colunas em reais mantidas por compatibilidade (derivadas dos centavos)
+        'valor_bruto': cents_to_reais(valor_bruto),
+        'valor_taxa': cents_to_reais(valor_taxa),
+        'valor_liquido': cents_to_reais(valor_liquido),
+        'status': (row.get(COL_STATUS) or '').strip(),
+        'client_name': (row.get(COL_NOME_CLIENTE) or '').strip(),
+        'client_email': (row.get(COL_EMAIL_CLIENTE) or '').strip(),
+    }
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _insert_ignoring_conflicts(model, rows, index_elements):
+    """INSERT em lote que ignora conflitos na chave única, quando o dialeto suporta
+
+    Retorna as chaves (index_elements[0]) das linhas gravadas: as que outra importação
+    confirmou depois da consulta de duplicatas ficam de fora.
+    """
+    if not rows:
+        return set()
+    key = index_elements[0]
+    dialect = db.session.get_bind().dialect
+    if dialect.name in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect.name == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(model).on_conflict_do_nothing(index_elements=index_elements)
+        if dialect.insert_executemany_returning:
+            return set(db.session.scalars(stmt.returning(getattr(model, key)), rows))
+    else:
+        stmt = insert(model)
+    db.session.execute(stmt, rows)
+    # Sem RETURNING (ex.: SQLite < 3.35) todas as linhas contam como gravadas
+    return {row[key] for row in rows}
+
+class RowParser:
+    """Normaliza linhas do extrato, contando linhas inválidas e células malformadas"""
+
+    def __init__(self, strict=False, filename=None):
+        # Modo estrito: linhas com qualquer célula malformada são rejeitadas
+        self.strict = strict
+        # Nome do arquivo nas células reportadas (uploads com vários arquivos)
+        self.filename = filename
+        self.total_rows = 0
+        self.invalid_rows = 0
+        self.malformed_cells = 0
+        self.parse_issues = []
+
+    def parse_rows(self, rows):
+        """Converte linhas do CSV em registros, descartando as inválidas"""
+        records = []
+        for row in rows:
+            self.total_rows += 1
+            record = normalize_row(row, self.strict, self._report)
+            if record is not None:
+                records.append(record)
+            else:
+                self.invalid_rows += 1
+        return records
+
+    def merge_counts(self, other):
+        """Soma as contagens de outro parser (ex.: arquivo processado em outro processo)"""
+        self.total_rows += other.total_rows
+        self.invalid_rows += other.invalid_rows
+        self.malformed_cells += other.malformed_cells
+        self.parse_issues.extend(other.parse_issues[:MAX_PARSE_ISSUES - len(self.parse_issues)])
+
+    def _report(self, column, value):
+        self.malformed_cells += 1
+        if len(self.parse_issues) < MAX_PARSE_ISSUES:
+            # Linha 1 é o cabeçalho
+            issue = {'linha': self.total_rows + 1, 'coluna': column, 'valor': value}
+            if self.filename:
+                issue['arquivo'] = self.filename
+            self.parse_issues.append(issue)
+
+class BulkImporter(RowParser):
+    """Importa linhas do extrato em lotes, resolvendo duplicatas e máquinas com uma consulta por lote"""
+
+    def __init__(self, batch_size=BATCH_SIZE, on_chunk=None, strict=False):
+        super().__init__(strict)
+        self.batch_size = batch_size
+        # Chamado após cada lote gravado (ex.: progresso de jobs em segundo plano)
+        self.on_chunk = on_chunk
+        self.new_transactions = 0
+        self.skipped_duplicates = 0
+        self.updated_machines = set()
+        self._seen_codes = set()
+        # PostgreSQL (psycopg2): lotes por COPY + mescla; demais bancos: executemany
+        self._use_copy = None
+        self._rows_since_analyze = 0
+
+    def import_rows(self, rows):
+        """Processa um iterável de linhas do CSV (dicts por nome de coluna), em lotes de tamanho fixo"""
+        for chunk in iter_row_chunks(rows, self.batch_size):
+            self.import_chunk(chunk)
+
+    def import_chunk(self, rows):
+        """Normaliza e grava um lote de linhas do CSV"""
+        records = self.parse_rows(rows)
+        if records:
+            self.write_batch(records)
+        if self.on_chunk:
+            self.on_chunk(self)
+
+    def import_records(self, records):
+        """Grava registros já normalizados (ex.: por outro processo), em lotes"""
+        for batch in _chunks(records, self.batch_size):
+            self.write_batch(batch)
+            if self.on_chunk:
+                self.on_chunk(self)
+
+    def write_batch(self, records):
+        """Grava um lote de registros normalizados"""
+        if self._use_copy is None:
+            self._use_copy = supports_copy()
+        if self._use_copy:
+            self._copy_batch(records)
+            return
+
+        # Duplicatas dentro do próprio upload não precisam ir ao banco
+        candidates = []
+        for record in records:
+            if record['codigo_transacao'] in self._seen_codes:
+                self.skipped_duplicates += 1
+                continue
+            self._seen_codes.add(record['codigo_transacao'])
+            candidates.append(record)
+
+        existing_codes = set()
+        for chunk in _chunks([r['codigo_transacao'] for r in candidates], IN_CHUNK_SIZE):
+            existing_codes.update(db.session.scalars(
+                select(Transaction.codigo_transacao).where(Transaction.codigo_transacao.in_(chunk))
+            ))
+
+        new_records = []
+        for record in candidates:
+            if record['codigo_transacao'] in existing_codes:
+                self.skipped_duplicates += 1
+            else:
+                new_records.append(record)
+        if not new_records:
+            return
+
+        self._upsert_machines(new_records)
+        inserted = _insert_ignoring_conflicts(
+            Transaction,
+            [{field: r[field] for field in TRANSACTION_FIELDS} for r in new_records],
+            ['codigo_transacao']
+        )
+        # Contar (e somar nos totais) só o que foi gravado: outra importação pode ter
+        # confirmado os mesmos códigos entre a consulta acima e o INSERT
+        written = [r for r in new_records if r['codigo_transacao'] in inserted]
+        self.skipped_duplicates += len(new_records) - len(written)
+        if written:
+            self._record_new(written)
+
+    def _copy_batch(self, records):
+        """Lote pelo COPY do PostgreSQL: o banco resolve as duplicatas na mescla"""
+        inserted, new_machines = copy_merge_batch(records, TRANSACTION_FIELDS)
+        _insert_ignoring_conflicts(MachineConfig, [{'machine_id': m} for m in new_machines], ['machine_id'])
+
+        # Registros gravados, na ordem do arquivo (a primeira ocorrência de cada código)
+        new_records = []
+        for record in records:
+            if record['codigo_transacao'] in inserted:
+                inserted.discard(record['codigo_transacao'])
+                new_records.append(record)
+        self.skipped_duplicates += len(records) - len(new_records)
+        if new_records:
+            self._record_new(new_records)
+
+        self._rows_since_analyze += len(new_records)
+        if self._rows_since_analyze >= ANALYZE_AFTER_ROWS:
+            refresh_statistics()
+            self._rows_since_analyze = 0
+
+    def _record_new(self, new_records):
+        apply_summary_deltas(new_records)
+        self.new_transactions += len(new_records)
+        self.updated_machines.update(r['machine_id'] for r in new_records)
+
+    def _upsert_machines(self, records):
+        """Cria máquinas novas (com configuração padrão) e atualiza nome/e-mail das existentes"""
+        # Último nome/e-mail não vazio de cada máquina no lote
+        contacts = {}
+        for record in records:
+            name, email = contacts.get(record['machine_id'], ('', ''))
+            contacts[record['machine_id']] = (
+                record['client_name'] or name,
+                record['client_email'] or email
+            )
+
+        existing = {}
+        for chunk in _chunks(contacts, IN_CHUNK_SIZE):
+            for row in db.session.execute(
+                select(Machine.id, Machine.machine_id, Machine.client_name, Machine.client_email)
+                .where(Machine.machine_id.in_(chunk))
+            ):
+                existing[row.machine_id] = row
+
+        now = datetime.utcnow()
+        new_machines = []
+        machine_updates = []
+        for machine_id, (name, email) in contacts.items():
+            current = existing.get(machine_id)
+            if current is None:
+                new_machines.append({'machine_id': machine_id, 'client_name': name, 'client_email': email})
+            else:
+                machine_updates.append({
+                    'id': current.id,
+                    'client_name': name or current.client_name,
+                    'client_email': email or current.client_email,
+                    'updated_at': now
+                })
+
+        _insert_ignoring_conflicts(Machine, new_machines, ['machine_id'])
+        _insert_ignoring_conflicts(
+            MachineConfig, [{'machine_id': m['machine_id']} for m in new_machines], ['machine_id']
+        )
+        if machine_updates:
+            db.session.execute(update(Machine), machine_updates)
+
+def upload_summary(importer):
+    """Monta a resposta do upload a partir das contagens da importação"""
+    # Buscar todas as máquinas para retornar (incluindo as existentes)
+    machines_data = Machine.get_summaries()
+    message = f'✅ Upload concluído! {importer.new_transactions} novas transações adicionadas. Total: {len(machines_data)} máquinas no sistema ({importer.skipped_duplicates} duplicatas ignoradas)'
+    if importer.malformed_cells:
+        message += f' - {importer.malformed_cells} células malformadas, {importer.invalid_rows} linhas rejeitadas'
+
+    return {
+        'success': True,
+        'clients': machines_data,
+        'total_clients': len(machines_data),
+        'new_transactions': importer.new_transactions,
+        'skipped_duplicates': importer.skipped_duplicates,
+        'updated_machines': len(importer.updated_machines),
+        'total_rows_processed': importer.total_rows,
+        'invalid_rows': importer.invalid_rows,
+        'malformed_cells': importer.malformed_cells,
+        'parse_issues': importer.parse_issues,
+        'message': message
+    }
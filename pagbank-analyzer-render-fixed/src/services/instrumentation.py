@@ -0,0 +1,239 @@
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Instrumentação opcional (PERF_INSTRUMENTATION=1): tempo por endpoint, consultas SQL,
+# linhas processadas e tamanho da resposta, expostos em Server-Timing e /api/metrics
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION') == '1'
+
+# Requisições mais lentas que este limite (ms) têm a pilha amostrada gravada em arquivo; 0 desliga
+PERF_SLOW_REQUEST_MS = float(os.environ.get('PERF_SLOW_REQUEST_MS', '0'))
+PERF_SAMPLE_INTERVAL_MS = float(os.environ.get('PERF_SAMPLE_INTERVAL_MS', '5'))
+PERF_PROFILE_DIR = os.environ.get('PERF_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'pagbank-profiles'))
+
+# Limites (segundos) do histograma de latência
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class RequestStats:
+    """Números acumulados durante uma requisição"""
+
+    __slots__ = ('endpoint', 'method', 'thread_id', 'started', 'sql_count', 'sql_time', 'rows',
+                 'response_bytes', 'samples', '_query_started')
+
+    def __init__(self, endpoint, method):
+        self.endpoint = endpoint
+        self.method = method
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.response_bytes = 0
+        self.samples = Counter()
+        self._query_started = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+class MetricsRegistry:
+    """Contadores por endpoint no formato de texto do Prometheus (um registro por processo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._duration_sum = Counter()
+        self._duration_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self._sql_count = Counter()
+        self._sql_time = Counter()
+        self._rows = Counter()
+        self._response_bytes = Counter()
+
+    def observe(self, stats, status, duration):
+        key = (stats.endpoint, stats.method)
+        with self._lock:
+            self._requests[key + (str(status),)] += 1
+            self._duration_sum[key] += duration
+            buckets = self._duration_buckets[key]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            self._sql_count[key] += stats.sql_count
+            self._sql_time[key] += stats.sql_time
+            self._rows[key] += stats.rows
+            self._response_bytes[key] += stats.response_bytes
+
+    def render(self):
+        def labels(endpoint, method, **extra):
+            pairs = {'endpoint': endpoint, 'method': method, **extra}
+            return ','.join(f'{name}="{value}"' for name, value in pairs.items())
+
+        lines = []
+        with self._lock:
+            lines.append('# HELP pagbank_requests_total Requisições atendidas')
+            lines.append('# TYPE pagbank_requests_total counter')
+            for (endpoint, method, status), value in sorted(self._requests.items()):
+                lines.append(f'pagbank_requests_total{{{labels(endpoint, method, status=status)}}} {value}')
+
+            lines.append('# HELP pagbank_request_duration_seconds Tempo total da requisição')
+            lines.append('# TYPE pagbank_request_duration_seconds histogram')
+            for (endpoint, method), buckets in sorted(self._duration_buckets.items()):
+                count = sum(value for (e, m, _), value in self._requests.items() if (e, m) == (endpoint, method))
+                for bound, value in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'pagbank_request_duration_seconds_bucket{{{labels(endpoint, method, le=bound)}}} {value}')
+                lines.append(f'pagbank_request_duration_seconds_bucket{{{labels(endpoint, method, le="+Inf")}}} {count}')
+                lines.append(f'pagbank_request_duration_seconds_sum{{{labels(endpoint, method)}}} {self._duration_sum[(endpoint, method)]:.6f}')
+                lines.append(f'pagbank_request_duration_seconds_count{{{labels(endpoint, method)}}} {count}')
+
+            for name, help_text, values, fmt in (
+                ('pagbank_sql_statements_total', 'Consultas SQL executadas', self._sql_count, '{}'),
+                ('pagbank_sql_duration_seconds_total', 'Tempo gasto em consultas SQL', self._sql_time, '{:.6f}'),
+                ('pagbank_rows_processed_total', 'Linhas/transações processadas', self._rows, '{}'),
+                ('pagbank_response_bytes_total', 'Bytes enviados no corpo das respostas', self._response_bytes, '{}'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (endpoint, method), value in sorted(values.items()):
+                    lines.append(f'{name}{{{labels(endpoint, method)}}} {fmt.format(value)}')
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+class StackSampler:
+    """Profiler por amostragem: uma thread lê periodicamente a pilha das requisições em andamento"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, stats):
+        with self._lock:
+            self._active[stats.thread_id] = stats
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='perf-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self, stats):
+        with self._lock:
+            if self._active.get(stats.thread_id) is stats:
+                del self._active[stats.thread_id]
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.values())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for stats in active:
+                frame = frames.get(stats.thread_id)
+                if frame is not None:
+                    stats.samples[_collapse(frame)] += 1
+
+def _collapse(frame):
+    """Pilha no formato 'collapsed' (raiz;...;folha) usado pelos flame graphs"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+sampler = StackSampler(PERF_SAMPLE_INTERVAL_MS / 1000)
+
+def _dump_profile(stats, duration):
+    os.makedirs(PERF_PROFILE_DIR, exist_ok=True)
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{stats.endpoint}-{int(duration * 1000)}ms.collapsed"
+    path = os.path.join(PERF_PROFILE_DIR, filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in stats.samples.most_common():
+            f.write(f'{stack} {count}\n')
+    logger.warning("🐢 Requisição lenta %s %s (%.0f ms): perfil salvo em %s", stats.method, stats.endpoint, duration * 1000, path)
+
+def _current_stats():
+    return g.get('request_stats') if has_app_context() else None
+
+def record_rows(count):
+    """Soma linhas processadas à requisição atual (sem efeito com a instrumentação desligada)"""
+    stats = _current_stats()
+    if stats is not None:
+        stats.rows += count
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is not None:
+        stats._query_started.append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is not None and stats._query_started:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - stats._query_started.pop()
+
+def _finish(stats, status):
+    duration = stats.elapsed()
+    if PERF_SLOW_REQUEST_MS:
+        sampler.stop(stats)
+        if duration * 1000 >= PERF_SLOW_REQUEST_MS and stats.samples:
+            _dump_profile(stats, duration)
+    metrics.observe(stats, status, duration)
+
+def _count_bytes(body, stats):
+    for chunk in body:
+        stats.response_bytes += len(chunk)
+        yield chunk
+
+def _before_request():
+    stats = RequestStats(request.endpoint or 'unmatched', request.method)
+    g.request_stats = stats
+    if PERF_SLOW_REQUEST_MS:
+        sampler.start(stats)
+
+def _after_request(response):
+    stats = g.get('request_stats')
+    if stats is None:
+        return response
+
+    # Em respostas em streaming o corpo ainda não foi gerado: o cabeçalho traz o tempo
+    # até aqui e as métricas são fechadas quando o servidor termina de enviar o corpo
+    app_time = stats.elapsed()
+    response.headers['Server-Timing'] = ', '.join([
+        f'app;dur={app_time * 1000:.1f}',
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"',
+        f'rows;desc="{stats.rows}"'
+    ])
+    status = response.status_code
+    if response.is_streamed:
+        response.response = _count_bytes(response.response, stats)
+        response.call_on_close(lambda: _finish(stats, status))
+    else:
+        stats.response_bytes = response.calculate_content_length() or 0
+        _finish(stats, status)
+    return response
+
+def metrics_endpoint():
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def init_instrumentation(app):
+    """Registra os ganchos de medição e /api/metrics quando PERF_INSTRUMENTATION=1"""
+    if not PERF_INSTRUMENTATION:
+        return
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/api/metrics', 'metrics', metrics_endpoint, methods=['GET'])
+    logger.info("📈 Instrumentação ativa (perfil de requisições lentas: %s)",
+                f'{PERF_SLOW_REQUEST_MS:g} ms' if PERF_SLOW_REQUEST_MS else 'desligado')
@@ -0,0 +1,120 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+
+# Nível dos logs da aplicação: em produção (INFO) sai uma linha de resumo por requisição;
+# DEBUG mostra também os passos intermediários de cada rota
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# 'text' (padrão) ou 'json' (uma linha JSON por evento, para agregadores de log)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+
+# Logger raiz de todos os módulos do pacote src (logging.getLogger(__name__))
+APP_LOGGER = 'src'
+
+logger = logging.getLogger(__name__)
+
+# A thread que escreve os logs existe só no processo que a iniciou: depois de um fork
+# (workers do gunicorn com preload_app) cada processo inicia a sua, com uma fila nova
+_queue_handler = None
+_stream_handler = None
+_listener = None
+_listener_pid = None
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            **getattr(record, 'fields', {})
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(app=None):
+    """Envia os logs por uma fila para uma thread própria, sem bloquear o worker com I/O"""
+    global _queue_handler, _stream_handler
+    root = logging.getLogger(APP_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    if _queue_handler is None:
+        _stream_handler = logging.StreamHandler(sys.stderr)
+        if LOG_FORMAT == 'json':
+            _stream_handler.setFormatter(JsonFormatter())
+        else:
+            _stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        root.addHandler(_queue_handler)
+        root.propagate = False
+        # Esvaziar a fila ao encerrar o processo
+        atexit.register(_stop_listener)
+        os.register_at_fork(after_in_child=restart_logging)
+    restart_logging()
+
+    if app is not None:
+        app.before_request(_start_request_log)
+        app.after_request(_request_summary)
+
+def restart_logging():
+    """Inicia a thread dos logs neste processo (chamado também após o fork dos workers)"""
+    global _listener, _listener_pid
+    if _queue_handler is None or _listener_pid == os.getpid():
+        return
+    # Fila nova: o que ficou pendente na fila do processo pai é escrito por ele
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, _stream_handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+
+def _stop_listener():
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+def _request_counters():
+    counters = g.get('log_counters')
+    if counters is None:
+        counters = g.log_counters = Counter()
+    return counters
+
+def count(name, value=1):
+    """Soma a um contador da requisição atual, publicado na linha de resumo"""
+    if has_request_context():
+        _request_counters()[name] += value
+
+def tag(name, value):
+    """Anota um valor (ex.: cache=hit) na linha de resumo da requisição atual"""
+    if has_request_context():
+        _request_counters()[name] = value
+
+def _start_request_log():
+    g.log_started = time.perf_counter()
+
+def _request_summary(response):
+    started = g.get('log_started')
+    if started is None or not logger.isEnabledFor(logging.INFO):
+        return response
+    fields = {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'ms': round((time.perf_counter() - started) * 1000, 1),
+        **g.get('log_counters', {})
+    }
+    stats = g.get('request_stats')
+    if stats is not None:
+        # Consultas SQL contadas pela instrumentação (PERF_INSTRUMENTATION=1)
+        fields['queries'] = stats.sql_count
+    details = ' '.join(f'{name}={value}' for name, value in fields.items()
+                       if name not in ('method', 'path', 'status'))
+    logger.info('%s %s %s %s', request.method, request.path, response.status_code, details,
+                extra={'fields': fields})
+    return response
@@ -0,0 +1,32 @@
+# Valores em dinheiro são inteiros em centavos (ver services.parsing.parse_amount_cents);
+# a conversão para reais (float) acontece só na hora de montar o JSON.
+
+# Taxas percentuais viram inteiros com 4 casas decimais (3,19% -> 31900)
+RATE_SCALE = 10000
+# centavos * taxa inteira / RATE_DIVISOR = centavos da taxa
+RATE_DIVISOR = 100 * RATE_SCALE
+
+def cents_to_reais(cents):
+    """Centavos -> reais (float) para respostas JSON"""
+    return cents / 100 if cents else 0
+
+def reais_to_cents(value):
+    """Reais (float legado) -> centavos"""
+    return int(round(value * 100)) if value else 0
+
+def format_brazilian_cents(cents):
+    """Formata centavos no padrão brasileiro (1.234,56), como no extrato PagBank"""
+    cents = cents or 0
+    reais, centavos = divmod(abs(cents), 100)
+    sign = '-' if cents < 0 else ''
+    return f'{sign}{reais:,}'.replace(',', '.') + f',{centavos:02d}'
+
+def rate_units(percent):
+    """Taxa percentual (float) -> inteiro em 1/RATE_SCALE de ponto percentual"""
+    return int(round((percent or 0) * RATE_SCALE))
+
+def apply_rate(cents, units):
+    """Centavos da taxa sobre um valor, arredondando metade para longe do zero"""
+    product = cents * units
+    fee = (abs(product) + RATE_DIVISOR // 2) // RATE_DIVISOR
+    return -fee if product < 0 else fee
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from src.services.csv_stream import iter_csv_rows
+from src.services.ingest import BulkImporter, RowParser
+
+# Processos dedicados à leitura/validação dos arquivos (0 = no próprio worker).
+# Os arquivos seguintes são lidos enquanto o anterior é gravado no banco.
+_CPUS = os.cpu_count() or 1
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', str(min(4, _CPUS) if _CPUS > 1 else 0)))
+
+# Limites dos uploads: corpo da requisição (MAX_CONTENT_LENGTH, acima disso 413) e
+# tamanho descompactado de cada extrato e da soma dos extratos de um upload
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(100 * 1024 * 1024)))
+UPLOAD_MAX_FILE_BYTES = int(os.environ.get('UPLOAD_MAX_FILE_BYTES', str(50 * 1024 * 1024)))
+UPLOAD_MAX_TOTAL_BYTES = int(os.environ.get('UPLOAD_MAX_TOTAL_BYTES', str(500 * 1024 * 1024)))
+
+# Bloco usado ao copiar os extratos para o disco
+COPY_BLOCK_SIZE = 1024 * 1024
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Os processos (e a thread de gerenciamento) do pool pertencem ao processo que o criou
+        if _pool is None or _pool_pid != os.getpid():
+            _pool_pid = os.getpid()
+            # 'spawn': o processo do gunicorn já tem threads (logs, jobs), então fork não é seguro
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def _limit_error(name, limit, total=False):
+    scope = 'a soma dos extratos' if total else name
+    return ValueError(f'Upload recusado: {scope} excede o limite de {limit // (1024 * 1024)} MB (descompactado)')
+
+def _spool(source, name, directory, used):
+    """Copia um extrato para um arquivo em disco, em blocos, respeitando os limites; devolve (caminho, bytes)"""
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.csv')
+    size = 0
+    with os.fdopen(fd, 'wb') as target:
+        for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b''):
+            size += len(block)
+            if size > UPLOAD_MAX_FILE_BYTES:
+                raise _limit_error(name, UPLOAD_MAX_FILE_BYTES)
+            if used + size > UPLOAD_MAX_TOTAL_BYTES:
+                raise _limit_error(name, UPLOAD_MAX_TOTAL_BYTES, total=True)
+            target.write(block)
+    return path, size
+
+def iter_extract_files(files, directory):
+    """(nome, caminho) de cada extrato enviado, copiado para directory; arquivos .zip são
+    abertos e seus .csv descompactados um por vez"""
+    used = 0
+    for file in files:
+        stream = file.stream
+        is_zip = zipfile.is_zipfile(stream)
+        stream.seek(0)
+        if not is_zip:
+            path, size = _spool(stream, file.filename, directory, used)
+            used += size
+            yield file.filename, path
+            continue
+        with zipfile.ZipFile(stream) as archive:
+            for member in archive.infolist():
+                name = member.filename
+                if member.is_dir() or not name.lower().endswith('.csv') or name.startswith('__MACOSX/'):
+                    continue
+                name = f'{file.filename}/{name}'
+                # Tamanho declarado no zip: recusar antes de descompactar (a cópia confere os bytes reais)
+                if member.file_size > UPLOAD_MAX_FILE_BYTES:
+                    raise _limit_error(name, UPLOAD_MAX_FILE_BYTES)
+                if used + member.file_size > UPLOAD_MAX_TOTAL_BYTES:
+                    raise _limit_error(name, UPLOAD_MAX_TOTAL_BYTES, total=True)
+                with archive.open(member) as source:
+                    path, size = _spool(source, name, directory, used)
+                used += size
+                yield name, path
+
+def parse_extract(filename, path, strict=False):
+    """Lê e valida um extrato inteiro (executado nos processos de leitura)"""
+    parser = RowParser(strict, filename)
+    with open(path, 'rb') as source:
+        records = parser.parse_rows(iter_csv_rows(source))
+    return parser, records
+
+def _parse_in_pool(extracts, strict):
+    """Lê os extratos nos processos de leitura, devolvendo na ordem de envio
+
+    No máximo PARSE_WORKERS + 1 arquivos ficam em leitura ou aguardando gravação:
+    os processos continuam ocupados enquanto o worker grava o arquivo anterior.
+    """
+    pool = _get_pool()
+    pending = deque()
+    try:
+        for name, path in extracts:
+            pending.append((name, path, pool.submit(parse_extract, name, path, strict)))
+            if len(pending) > PARSE_WORKERS:
+                name, path, future = pending.popleft()
+                yield name, path, future.result()
+        while pending:
+            name, path, future = pending.popleft()
+            yield name, path, future.result()
+    finally:
+        # Erro em um arquivo: descartar as leituras que ainda não começaram
+        for _, _, future in pending:
+            future.cancel()
+
+def import_extracts(files, strict=False):
+    """Importa vários extratos: leitura em paralelo, gravação em um único escritor
+
+    Os arquivos são gravados na ordem de envio; duplicatas entre arquivos do mesmo
+    upload são descartadas em memória pelo importador, sem consultar o banco.
+    Limites de tamanho excedidos geram ValueError.
+    """
+    importer = BulkImporter(strict=strict)
+    per_file = []
+    with tempfile.TemporaryDirectory(prefix='extracts-') as directory:
+        extracts = iter_extract_files(files, directory)
+        head = list(islice(extracts, 2))
+        extracts = chain(head, extracts)
+        if PARSE_WORKERS > 0 and len(head) > 1:
+            parsed = _parse_in_pool(extracts, strict)
+        else:
+            parsed = ((name, path, parse_extract(name, path, strict)) for name, path in extracts)
+
+        for name, path, (parser, records) in parsed:
+            os.unlink(path)
+            new_before, skipped_before = importer.new_transactions, importer.skipped_duplicates
+            importer.merge_counts(parser)
+            importer.import_records(records)
+            # Liberar os registros antes de aguardar o próximo arquivo
+            del records
+            per_file.append({
+                'filename': name,
+                'total_rows': parser.total_rows,
+                'new_transactions': importer.new_transactions - new_before,
+                'skipped_duplicates': importer.skipped_duplicates - skipped_before,
+                'invalid_rows': parser.invalid_rows,
+                'malformed_cells': parser.malformed_cells
+            })
+    return importer, per_file
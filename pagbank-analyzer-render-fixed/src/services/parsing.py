@@ -0,0 +1,75 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+# Parsers das células do extrato PagBank, no caminho quente da importação.
+# No modo estrito uma célula malformada levanta MalformedCell; no modo tolerante
+# o parser devolve o valor padrão (None para datas, 0 para valores).
+
+# Datas distintas guardadas em memória (o extrato repete o mesmo minuto em muitas linhas)
+DATE_CACHE_SIZE = 8192
+
+# Layout fixo do extrato: validar e separar os campos com uma única regex é bem mais
+# barato que strptime
+_DATE_TIME_RE = re.compile(r'(\d\d)/(\d\d)/(\d{4}) (\d\d):(\d\d)', re.ASCII)
+_DATE_RE = re.compile(r'(\d\d)/(\d\d)/(\d{4})', re.ASCII)
+
+class MalformedCell(ValueError):
+    """Célula que não pôde ser convertida"""
+
+    def __init__(self, kind, value):
+        super().__init__(f'{kind} inválido: {value!r}')
+        self.kind = kind
+        self.value = value
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(value):
+    """DD/MM/YYYY HH:MM ou DD/MM/YYYY; None se malformada"""
+    try:
+        match = (_DATE_TIME_RE if len(value) == 16 else _DATE_RE).fullmatch(value)
+        if match is not None:
+            dia, mes, ano, *hora = match.groups()
+            return datetime(int(ano), int(mes), int(dia), *map(int, hora))
+        # Demais variações aceitas pelo strptime (ex.: dia ou mês com um dígito)
+        if ' ' in value:
+            return datetime.strptime(value, '%d/%m/%Y %H:%M')
+        return datetime.strptime(value, '%d/%m/%Y')
+    except ValueError:
+        return None
+
+def parse_date(value, strict=False):
+    """Converte 'DD/MM/YYYY[ HH:MM]' em datetime; célula vazia = None"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    parsed = _parse_date(value)
+    if parsed is None and strict:
+        raise MalformedCell('Data', value)
+    return parsed
+
+def parse_amount_cents(value, strict=False):
+    """Converte '1.234,56' em 123456 centavos sem passar por float; célula vazia = 0"""
+    if not value:
+        return 0
+    # Caminho rápido: formato do extrato, com duas casas decimais e sem sinal
+    if value[-3:-2] == ',':
+        digits = value.replace('.', '').replace(',', '')
+        if digits.isdigit() and digits.isascii() and value.count(',') == 1:
+            return int(digits)
+
+    clean = value.strip().replace('.', '')
+    if not clean:
+        return 0
+    negative = clean[0] == '-'
+    if negative or clean[0] == '+':
+        clean = clean[1:]
+    inteiro, _, fracao = clean.partition(',')
+    if not (inteiro or fracao) or not (inteiro + fracao).isdigit() or not clean.isascii():
+        if strict:
+            raise MalformedCell('Valor', value)
+        return 0
+    cents = int(inteiro or 0) * 100 + int(fracao[:2].ljust(2, '0'))
+    # Mais de duas casas decimais: arredondar metade para cima
+    if len(fracao) > 2 and fracao[2] >= '5':
+        cents += 1
+    return -cents if negative else cents
@@ -0,0 +1,125 @@
+import io
+from datetime import datetime
+from sqlalchemy import text
+from src.models.user import db
+
+# Importação no PostgreSQL: cada lote vai por COPY ... FROM STDIN para uma tabela
+# temporária (sem WAL e visível só na própria conexão) e é mesclado em machines e
+# transactions com INSERT ... ON CONFLICT; as duplicatas saem da própria mescla.
+
+STAGING_TABLE = 'import_staging'
+
+# Colunas da tabela de carga, na ordem do COPY (seq = posição da linha no upload)
+STAGING_COLUMNS = (
+    ('seq', 'integer'),
+    ('machine_id', 'text'),
+    ('codigo_transacao', 'text'),
+    ('data_transacao', 'timestamp'),
+    ('forma_pagamento', 'text'),
+    ('parcelas', 'text'),
+    ('tipo_pagamento', 'smallint'),
+    ('num_parcelas', 'smallint'),
+    ('valor_bruto_centavos', 'bigint'),
+    ('valor_taxa_centavos', 'bigint'),
+    ('valor_liquido_centavos', 'bigint'),
+    ('valor_bruto', 'double precision'),
+    ('valor_taxa', 'double precision'),
+    ('valor_liquido', 'double precision'),
+    ('status', 'text'),
+    ('client_name', 'text'),
+    ('client_email', 'text'),
+)
+
+# Transações novas gravadas desde o último ANALYZE de transactions: sem estatísticas
+# atualizadas (o autovacuum demora) o planejador troca a busca pelo índice por uma
+# varredura completa a cada lote
+ANALYZE_AFTER_ROWS = 20000
+
+# Primeira ocorrência de cada código no lote (mesma regra do caminho SQLite: a primeira
+# linha vence); as já gravadas são removidas da carga logo após o COPY
+_FRESH_ROWS = f"""
+    SELECT DISTINCT ON (codigo_transacao) * FROM {STAGING_TABLE} ORDER BY codigo_transacao, seq
+"""
+
+# Máquinas das transações novas: cria as que faltam e atualiza nome/e-mail com o último
+# valor não vazio do lote, na ordem em que aparecem. xmax = 0 identifica as linhas inseridas (não atualizadas).
+_MERGE_MACHINES = f"""
+    INSERT INTO machines (machine_id, client_name, client_email, created_at, updated_at)
+    SELECT machine_id,
+           COALESCE((array_agg(client_name ORDER BY seq DESC) FILTER (WHERE client_name <> ''))[1], ''),
+           COALESCE((array_agg(client_email ORDER BY seq DESC) FILTER (WHERE client_email <> ''))[1], ''),
+           :now, :now
+    FROM ({_FRESH_ROWS}) fresh
+    GROUP BY machine_id
+    ORDER BY min(seq)
+    ON CONFLICT (machine_id) DO UPDATE SET
+        client_name = COALESCE(NULLIF(excluded.client_name, ''), machines.client_name),
+        client_email = COALESCE(NULLIF(excluded.client_email, ''), machines.client_email),
+        updated_at = excluded.updated_at
+    RETURNING machine_id, (xmax = 0) AS inserted
+"""
+
+def _copy_value(value):
+    """Valor no formato texto do COPY (\\N = NULL)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, str):
+        return (value.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+    return str(value)
+
+def _copy_buffer(records):
+    buffer = io.StringIO()
+    for seq, record in enumerate(records):
+        values = [seq] + [record[name] for name, _ in STAGING_COLUMNS[1:]]
+        buffer.write('\t'.join(map(_copy_value, values)))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+def supports_copy():
+    """COPY direto só com o driver psycopg2 (os demais usam o caminho genérico)"""
+    bind = db.session.get_bind()
+    return bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2'
+
+def copy_merge_batch(records, fields):
+    """Carrega um lote por COPY e mescla nas tabelas definitivas
+
+    Retorna (códigos inseridos, máquinas criadas).
+    """
+    connection = db.session.connection()
+    columns = ', '.join(f'{name} {sql_type}' for name, sql_type in STAGING_COLUMNS)
+    # ON COMMIT DROP: nada fica para trás na conexão devolvida ao pool
+    connection.exec_driver_sql(f'CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ({columns}) ON COMMIT DROP')
+    connection.exec_driver_sql(f'TRUNCATE {STAGING_TABLE}')
+
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(name for name, _ in STAGING_COLUMNS)}) FROM STDIN",
+            _copy_buffer(records)
+        )
+    finally:
+        cursor.close()
+    # Já gravadas (inclusive por lotes anteriores do mesmo upload) não seguem para a mescla
+    connection.exec_driver_sql(
+        f'DELETE FROM {STAGING_TABLE} s USING transactions t WHERE t.codigo_transacao = s.codigo_transacao'
+    )
+
+    # Máquinas antes das transações (chave estrangeira)
+    machines = connection.execute(text(_MERGE_MACHINES), {'now': datetime.utcnow()}).all()
+
+    field_list = ', '.join(fields)
+    inserted = connection.execute(text(f"""
+        INSERT INTO transactions ({field_list})
+        SELECT {field_list} FROM ({_FRESH_ROWS}) fresh ORDER BY seq
+        ON CONFLICT (codigo_transacao) DO NOTHING
+        RETURNING codigo_transacao
+    """)).scalars().all()
+
+    return set(inserted), [row.machine_id for row in machines if row.inserted]
+
+def refresh_statistics():
+    db.session.connection().exec_driver_sql('ANALYZE transactions')
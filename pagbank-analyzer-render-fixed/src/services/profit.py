@@ -0,0 +1,149 @@
+from src.models.user import db
+from src.models.machine import Transaction
+from src.models.rate_schedule import MAX_PARCELAS, SLOT_DEBITO, SLOT_PIX, SLOT_SEM_TAXA
+from src.services.money import RATE_DIVISOR, apply_rate, cents_to_reais, rate_units, reais_to_cents
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional - sem ele usamos o cálculo em Python puro
+    np = None
+
+# Códigos de forma de pagamento
+TIPO_DESCONHECIDO = 0
+TIPO_CREDITO = 1
+TIPO_DEBITO = 2
+TIPO_PIX = 3
+
+_PARCELAS_VALIDAS = {str(n): n for n in range(1, MAX_PARCELAS + 1)}
+
+def classify_payment(forma_pagamento, parcelas):
+    """Retorna (tipo, número de parcelas) da transação; parcelas 0 = crédito sem taxa configurável"""
+    if forma_pagamento and 'Crédito' in forma_pagamento:
+        parcelas_str = parcelas or '1x'
+        if 'x' in parcelas_str:
+            parcelas_num = parcelas_str.replace('x', '').replace('Parcelado ', '').strip()
+            return TIPO_CREDITO, _PARCELAS_VALIDAS.get(parcelas_num, 0)
+        # Se não tem 'x', assumir 1x
+        return TIPO_CREDITO, 1
+    elif forma_pagamento and 'Débito' in forma_pagamento:
+        return TIPO_DEBITO, 1
+    elif forma_pagamento and 'PIX' in forma_pagamento:
+        return TIPO_PIX, 1
+    return TIPO_DESCONHECIDO, 0
+
+def rate_slot(tipo, parcelas_num):
+    """Posição da taxa do cliente no vetor de taxas"""
+    if tipo == TIPO_CREDITO:
+        return parcelas_num - 1 if parcelas_num else SLOT_SEM_TAXA
+    if tipo == TIPO_DEBITO:
+        return SLOT_DEBITO
+    if tipo == TIPO_PIX:
+        return SLOT_PIX
+    return SLOT_SEM_TAXA
+
+def build_rate_vector(config):
+    """Vetor com as 18 taxas de crédito, débito, PIX e a posição 'sem taxa'"""
+    return config.rate_schedule.vector()
+
+def load_profit_columns(machine_id):
+    """Carrega as transações da máquina em colunas (uma lista por campo, valores em centavos)"""
+    rows = db.session.query(
+        Transaction.codigo_transacao, Transaction.data_transacao, Transaction.forma_pagamento,
+        Transaction.parcelas, Transaction.tipo_pagamento, Transaction.num_parcelas,
+        Transaction.valor_bruto_centavos, Transaction.valor_taxa_centavos,
+        Transaction.valor_bruto, Transaction.valor_taxa
+    ).filter(Transaction.machine_id == machine_id).order_by(Transaction.id).all()
+
+    columns = {
+        'codigo_transacao': [], 'data_transacao': [], 'forma_pagamento': [], 'parcelas': [],
+        'valor_bruto': [], 'valor_taxa': [], 'slot': []
+    }
+    for codigo, data, forma, parcelas, tipo, parcelas_num, bruto, taxa, bruto_reais, taxa_reais in rows:
+        columns['codigo_transacao'].append(codigo)
+        columns['data_transacao'].append(data.isoformat() if data else None)
+        columns['forma_pagamento'].append(forma)
+        columns['parcelas'].append(parcelas)
+        # Linha sem centavos (gravada antes da migração): converter os reais
+        columns['valor_bruto'].append(bruto if bruto is not None else reais_to_cents(bruto_reais))
+        columns['valor_taxa'].append(taxa if taxa is not None else reais_to_cents(taxa_reais))
+        if tipo is None:
+            # Linha ainda não normalizada
+            tipo, parcelas_num = classify_payment(forma, parcelas)
+        columns['slot'].append(rate_slot(tipo, parcelas_num))
+    return columns
+
+# Aritmética inteira: centavos * taxa (em 1/RATE_SCALE de ponto percentual), arredondada
+# para o centavo mais próximo. Os dois caminhos devolvem exatamente os mesmos inteiros.
+
+def _client_fees_numpy(valor_bruto, valor_taxa, slots, units_vector):
+    units = np.asarray(units_vector, dtype=np.int64)[np.asarray(slots, dtype=np.intp)]
+    product = np.asarray(valor_bruto, dtype=np.int64) * units
+    sua_taxa = np.sign(product) * ((np.abs(product) + RATE_DIVISOR // 2) // RATE_DIVISOR)
+    seu_lucro = sua_taxa - np.asarray(valor_taxa, dtype=np.int64)
+    return sua_taxa.tolist(), seu_lucro.tolist(), int(sua_taxa.sum()), int(seu_lucro.sum())
+
+def _client_fees_python(valor_bruto, valor_taxa, slots, units_vector):
+    sua_taxa = [apply_rate(bruto, units_vector[slot]) for bruto, slot in zip(valor_bruto, slots)]
+    seu_lucro = [taxa_cliente - taxa for taxa_cliente, taxa in zip(sua_taxa, valor_taxa)]
+    return sua_taxa, seu_lucro, sum(sua_taxa), sum(seu_lucro)
+
+def client_fees(valor_bruto, valor_taxa, slots, units_vector, use_numpy=None):
+    """Taxa do cliente e lucro por valor, e seus totais (centavos); slots indexam units_vector"""
+    if use_numpy is None:
+        use_numpy = np is not None
+    client_fees_impl = _client_fees_numpy if use_numpy else _client_fees_python
+    return client_fees_impl(valor_bruto, valor_taxa, slots, units_vector)
+
+def compute_profit(columns, rate_vector, use_numpy=None, columnar=False):
+    """Calcula taxa do cliente, lucro por transação e totais (em centavos) em uma única passada.
+
+    columnar=True devolve as transações em colunas (uma lista por campo) em vez de uma lista de objetos.
+    """
+    slots = columns['slot']
+    units_vector = [rate_units(rate) for rate in rate_vector]
+    sua_taxa, seu_lucro, total_taxa_cliente, total_lucro = client_fees(
+        columns['valor_bruto'], columns['valor_taxa'], slots, units_vector, use_numpy
+    )
+
+    if columnar:
+        profit_data = {
+            'codigo_transacao': columns['codigo_transacao'],
+            'data_transacao': columns['data_transacao'],
+            'forma_pagamento': columns['forma_pagamento'],
+            'parcela': columns['parcelas'],
+            'valor_bruto': [cents_to_reais(bruto) for bruto in columns['valor_bruto']],
+            'valor_taxa': [cents_to_reais(taxa) for taxa in columns['valor_taxa']],
+            'sua_taxa': [cents_to_reais(taxa_cliente) for taxa_cliente in sua_taxa],
+            'seu_lucro': [cents_to_reais(lucro) for lucro in seu_lucro],
+            'taxa_cliente_percent': [rate_vector[slot] for slot in slots]
+        }
+    else:
+        profit_data = [
+            {
+                'codigo_transacao': codigo,
+                'data_transacao': data,
+                'forma_pagamento': forma,
+                'parcela': parcelas,
+                'valor_bruto': cents_to_reais(bruto),
+                'valor_taxa': cents_to_reais(taxa),
+                'sua_taxa': cents_to_reais(taxa_cliente),
+                'seu_lucro': cents_to_reais(lucro),
+                'taxa_cliente_percent': rate_vector[slot]
+            }
+            for codigo, data, forma, parcelas, bruto, taxa, taxa_cliente, lucro, slot in zip(
+                columns['codigo_transacao'], columns['data_transacao'], columns['forma_pagamento'],
+                columns['parcelas'], columns['valor_bruto'], columns['valor_taxa'],
+                sua_taxa, seu_lucro, slots
+            )
+        ]
+
+    result = {
+        'success': True,
+        'suas_taxas_total': cents_to_reais(total_taxa_cliente),
+        'lucro_total': cents_to_reais(total_lucro),
+        'margem_lucro': (total_lucro / total_taxa_cliente * 100) if total_taxa_cliente > 0 else 0,
+        'transactions': profit_data
+    }
+    if columnar:
+        result['format'] = 'columns'
+    return result
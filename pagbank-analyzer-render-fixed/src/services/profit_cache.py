@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from src.models.user import db
+from src.models.machine_summary import MachineSummary
+
+# Limites do cache em memória (por worker do gunicorn)
+PROFIT_CACHE_MAX_BYTES = int(os.environ.get('PROFIT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+PROFIT_CACHE_MAX_ENTRIES = int(os.environ.get('PROFIT_CACHE_MAX_ENTRIES', '256'))
+
+# Arquivo SQLite opcional compartilhado entre todos os workers
+PROFIT_CACHE_PATH = os.environ.get('PROFIT_CACHE_PATH')
+
+# Mudar quando o formato/cálculo do resultado mudar (descarta entradas antigas do arquivo)
+PROFIT_RESULT_FORMAT = 2
+
+def profit_version(machine_id, config):
+    """Carimbo de versão do cálculo: muda quando a configuração é salva ou chegam novas transações"""
+    summary = db.session.query(
+        MachineSummary.ingest_version, MachineSummary.total_transacoes, MachineSummary.updated_at
+    ).filter(MachineSummary.machine_id == machine_id).first()
+    ingest_version, total_transacoes, summary_updated_at = summary or (0, 0, None)
+    config_updated_at = config.updated_at.isoformat() if config.updated_at else ''
+    summary_updated_at = summary_updated_at.isoformat() if summary_updated_at else ''
+    return f'{PROFIT_RESULT_FORMAT}|{config_updated_at}|{ingest_version}|{total_transacoes}|{summary_updated_at}'
+
+def profit_etag(machine_id, version):
+    return hashlib.sha1(f'{machine_id}|{version}'.encode('utf-8')).hexdigest()
+
+class _SQLiteBackend:
+    """Armazena os resultados em um arquivo SQLite compartilhado"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        # Uma conexão por thread, aberta no próprio processo (seguro após fork do gunicorn)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS profit_cache '
+                '(machine_id TEXT PRIMARY KEY, version TEXT NOT NULL, payload BLOB NOT NULL)'
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, machine_id, version):
+        row = self._connect().execute(
+            'SELECT payload FROM profit_cache WHERE machine_id = ? AND version = ?', (machine_id, version)
+        ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, machine_id, version, payload):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO profit_cache (machine_id, version, payload) VALUES (?, ?, ?)',
+                (machine_id, version, payload)
+            )
+
+    def delete(self, machine_id):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM profit_cache WHERE machine_id = ?', (machine_id,))
+
+class ProfitCache:
+    """Cache LRU dos resultados de /calculate-profit, com limite de memória"""
+
+    def __init__(self, max_bytes=PROFIT_CACHE_MAX_BYTES, max_entries=PROFIT_CACHE_MAX_ENTRIES, path=PROFIT_CACHE_PATH):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.backend = _SQLiteBackend(path) if path else None
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, machine_id, version):
+        """Retorna o JSON já serializado, ou None se ausente ou desatualizado"""
+        with self._lock:
+            entry = self._entries.get(machine_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(machine_id)
+                return entry[1]
+        if self.backend is not None:
+            payload = self.backend.get(machine_id, version)
+            if payload is not None:
+                self._store(machine_id, version, payload)
+                return payload
+        return None
+
+    def set(self, machine_id, version, payload):
+        self._store(machine_id, version, payload)
+        if self.backend is not None:
+            self.backend.set(machine_id, version, payload)
+
+    def invalidate(self, machine_id):
+        with self._lock:
+            self._discard(machine_id)
+        if self.backend is not None:
+            self.backend.delete(machine_id)
+
+    def _store(self, machine_id, version, payload):
+        with self._lock:
+            self._discard(machine_id)
+            # Resultados maiores que o limite inteiro não entram no cache em memória
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[machine_id] = (version, payload)
+            self._size += len(payload)
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _discard(self, machine_id):
+        entry = self._entries.pop(machine_id, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+profit_cache = ProfitCache()
@@ -0,0 +1,141 @@
+import math
+from sqlalchemy import func, select
+from src.models.user import db
+from src.models.machine import MachineConfig
+from src.models.machine_summary import MachineDailySummary
+from src.services.money import cents_to_reais, rate_units
+from src.models.rate_schedule import CONFIG_FIELDS
+from src.services.profit import build_rate_vector, classify_payment, client_fees, rate_slot
+
+# Simulação de tabelas de taxas sobre a frota inteira, sem alterar as configurações salvas.
+# Os totais (máquina, posição da taxa) -> bruto/taxa PagBank são lidos uma vez dos totais
+# diários; cada cenário é só uma passada de multiplicações inteiras sobre esses totais.
+# Como a taxa é aplicada ao total de cada posição, o resultado pode diferir em centavos
+# do cálculo transação a transação.
+
+# Posições do vetor de taxas (CONFIG_FIELDS + 'sem taxa')
+RATE_SLOTS = len(CONFIG_FIELDS) + 1
+
+MAX_SCENARIOS = 100
+
+def _scenario_rates(scenario, index):
+    """Nome e taxas informadas de um cenário (campos ausentes mantêm a taxa atual de cada máquina)"""
+    if not isinstance(scenario, dict):
+        raise ValueError(f'Cenário {index + 1} deve ser um objeto com as taxas')
+    rates = {}
+    for position, field in enumerate(CONFIG_FIELDS):
+        value = scenario.get(field)
+        if value is None:
+            continue
+        try:
+            rate = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Taxa inválida em {field} (cenário {index + 1}): {value!r}')
+        if not math.isfinite(rate):
+            raise ValueError(f'Taxa inválida em {field} (cenário {index + 1}): {value!r}')
+        rates[position] = rate
+    return str(scenario.get('nome') or f'Cenário {index + 1}'), rates
+
+def load_slot_totals(machine_ids=None):
+    """Totais por (máquina, posição da taxa): listas paralelas com máquina, posição, bruto, taxa e quantidade"""
+    query = (
+        select(
+            MachineDailySummary.machine_id, MachineDailySummary.forma_pagamento, MachineDailySummary.parcelas,
+            func.sum(MachineDailySummary.total_transacoes),
+            func.sum(MachineDailySummary.valor_bruto_centavos),
+            func.sum(MachineDailySummary.valor_taxa_centavos)
+        )
+        .group_by(MachineDailySummary.machine_id, MachineDailySummary.forma_pagamento,
+                  MachineDailySummary.parcelas)
+    )
+    if machine_ids is not None:
+        query = query.where(MachineDailySummary.machine_id.in_(machine_ids))
+
+    totals = {}
+    for machine_id, forma, parcelas, transacoes, bruto, taxa in db.session.execute(query):
+        key = (machine_id, rate_slot(*classify_payment(forma, parcelas)))
+        current = totals.get(key)
+        if current is None:
+            current = totals[key] = [0, 0, 0]
+        current[0] += int(transacoes)
+        current[1] += int(bruto)
+        current[2] += int(taxa)
+
+    columns = {'machine_id': [], 'slot': [], 'valor_bruto': [], 'valor_taxa': [], 'transacoes': []}
+    for (machine_id, slot), (transacoes, bruto, taxa) in sorted(totals.items()):
+        columns['machine_id'].append(machine_id)
+        columns['slot'].append(slot)
+        columns['valor_bruto'].append(bruto)
+        columns['valor_taxa'].append(taxa)
+        columns['transacoes'].append(transacoes)
+    return columns
+
+def _result(nome, machines, machine_index, fees):
+    """Totais do cenário por máquina e da frota"""
+    sua_taxa, seu_lucro, total_taxa_cliente, total_lucro = fees
+    per_machine = [[0, 0] for _ in machines]
+    for index, taxa_cliente, lucro in zip(machine_index, sua_taxa, seu_lucro):
+        per_machine[index][0] += taxa_cliente
+        per_machine[index][1] += lucro
+    return {
+        'nome': nome,
+        'sua_taxa': cents_to_reais(total_taxa_cliente),
+        'seu_lucro': cents_to_reais(total_lucro),
+        'margem_lucro': (total_lucro / total_taxa_cliente * 100) if total_taxa_cliente > 0 else 0,
+        'maquinas': [
+            {'machine_id': machine_id, 'sua_taxa': cents_to_reais(taxa_cliente), 'seu_lucro': cents_to_reais(lucro)}
+            for machine_id, (taxa_cliente, lucro) in zip(machines, per_machine)
+        ]
+    }
+
+def simulate_rates(data):
+    """Taxa do cliente e lucro projetados para cada cenário, comparados com as taxas atuais"""
+    scenarios = data.get('scenarios')
+    if scenarios is None and isinstance(data.get('rates'), dict):
+        scenarios = [data['rates']]
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError('Informe ao menos um cenário em "scenarios"')
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f'No máximo {MAX_SCENARIOS} cenários por simulação')
+    scenarios = [_scenario_rates(scenario, index) for index, scenario in enumerate(scenarios)]
+
+    machine_ids = data.get('machines')
+    if machine_ids is not None and not isinstance(machine_ids, list):
+        raise ValueError('"machines" deve ser uma lista de máquinas')
+
+    columns = load_slot_totals(machine_ids)
+    machines = sorted(set(columns['machine_id']))
+    positions = {machine_id: index for index, machine_id in enumerate(machines)}
+    machine_index = [positions[machine_id] for machine_id in columns['machine_id']]
+    # Uma faixa de RATE_SLOTS posições por máquina no vetor de taxas
+    flat_slots = [index * RATE_SLOTS + slot for index, slot in zip(machine_index, columns['slot'])]
+
+    current = {
+        config.machine_id: build_rate_vector(config)
+        for config in MachineConfig.query.filter(MachineConfig.machine_id.in_(machines))
+    } if machines else {}
+    current_units = [
+        [rate_units(rate) for rate in current.get(machine_id) or [0.0] * RATE_SLOTS] for machine_id in machines
+    ]
+
+    def run(nome, rates):
+        overrides = {position: rate_units(rate) for position, rate in rates.items()}
+        units_vector = []
+        for units in current_units:
+            if overrides:
+                units = list(units)
+                for position, value in overrides.items():
+                    units[position] = value
+            units_vector.extend(units)
+        fees = client_fees(columns['valor_bruto'], columns['valor_taxa'], flat_slots, units_vector)
+        return _result(nome, machines, machine_index, fees)
+
+    return {
+        'success': True,
+        'total_maquinas': len(machines),
+        'total_transacoes': sum(columns['transacoes']),
+        'valor_bruto': cents_to_reais(sum(columns['valor_bruto'])),
+        'valor_taxa': cents_to_reais(sum(columns['valor_taxa'])),
+        'atual': run('Atual', {}),
+        'cenarios': [run(nome, rates) for nome, rates in scenarios]
+    }
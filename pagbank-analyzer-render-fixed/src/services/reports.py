@@ -0,0 +1,168 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import cast, func, literal, select
+from sqlalchemy.types import Date
+from src.models.user import db
+from src.models.machine import MachineConfig
+from src.models.machine_summary import MachineDailySummary
+from src.services.money import apply_rate, cents_to_reais, rate_units
+from src.services.profit import (
+    TIPO_CREDITO, TIPO_DEBITO, TIPO_PIX, build_rate_vector, classify_payment, rate_slot
+)
+
+# Relatórios por período lidos da tabela de totais diários (machine_daily_summaries):
+# o custo depende do número de períodos x máquinas x formas de pagamento, não do
+# número de transações. A taxa do cliente é aplicada ao total de cada dia/forma de
+# pagamento, então pode diferir em centavos da soma transação a transação.
+
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_BY = ('machine', 'payment_type', 'installments')
+
+PAYMENT_TYPE_NAMES = {TIPO_CREDITO: 'credito', TIPO_DEBITO: 'debito', TIPO_PIX: 'pix'}
+
+# group_by=installments: só o crédito é agrupado por parcela (0 = crédito sem taxa
+# configurável); débito, PIX e formas desconhecidas ficam juntos neste grupo
+GRUPO_A_VISTA = 'avista'
+
+def _parse_day(value):
+    """Aceita YYYY-MM-DD ou DD/MM/YYYY"""
+    value = value.strip()
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Data inválida: {value}')
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def bucket_start(day, granularity):
+    """Primeiro dia do período (semanas começam na segunda-feira)"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def _bucket_column(granularity):
+    """Início do período calculado no banco (agrupa as linhas antes de chegarem ao Python)"""
+    dia = MachineDailySummary.dia
+    if granularity == 'day':
+        return dia
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(granularity, dia), Date)
+    if dialect == 'sqlite':
+        if granularity == 'month':
+            return func.date(dia, 'start of month')
+        # strftime('%w'): domingo = 0; recuar até a segunda-feira
+        return func.date(dia, literal('-') + cast((func.strftime('%w', dia) + 6) % 7, db.String) + ' days')
+    # Outros bancos: agrupar por dia e fechar o período em Python
+    return dia
+
+def _group_key(group_by, machine_id, tipo, num_parcelas):
+    if group_by == 'machine':
+        return machine_id
+    if group_by == 'payment_type':
+        return PAYMENT_TYPE_NAMES.get(tipo, 'outros')
+    if group_by == 'installments':
+        return num_parcelas if tipo == TIPO_CREDITO else GRUPO_A_VISTA
+    return None
+
+def _totals_dict(values):
+    transacoes, bruto, taxa, taxa_cliente = values
+    lucro = taxa_cliente - taxa
+    return {
+        'total_transacoes': transacoes,
+        'valor_bruto': cents_to_reais(bruto),
+        'valor_taxa': cents_to_reais(taxa),
+        'sua_taxa': cents_to_reais(taxa_cliente),
+        'seu_lucro': cents_to_reais(lucro),
+        'margem_lucro': (lucro / taxa_cliente * 100) if taxa_cliente > 0 else 0
+    }
+
+def revenue_report(args):
+    """Bruto, taxa PagBank, taxa do cliente e lucro por período (e grupo opcional)"""
+    granularity = args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'Granularidade inválida: {granularity}')
+    group_by = args.get('group_by') or None
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValueError(f'Agrupamento inválido: {group_by}')
+
+    bucket = _bucket_column(granularity).label('periodo')
+    query = (
+        select(
+            bucket, MachineDailySummary.machine_id, MachineDailySummary.forma_pagamento,
+            MachineDailySummary.parcelas,
+            func.sum(MachineDailySummary.total_transacoes),
+            func.sum(MachineDailySummary.valor_bruto_centavos),
+            func.sum(MachineDailySummary.valor_taxa_centavos)
+        )
+        .group_by(bucket, MachineDailySummary.machine_id, MachineDailySummary.forma_pagamento,
+                  MachineDailySummary.parcelas)
+    )
+    date_from = _parse_day(args['date_from']) if args.get('date_from') else None
+    date_to = _parse_day(args['date_to']) if args.get('date_to') else None
+    if date_from:
+        query = query.where(MachineDailySummary.dia >= date_from)
+    if date_to:
+        query = query.where(MachineDailySummary.dia <= date_to)
+    if args.get('machines'):
+        query = query.where(MachineDailySummary.machine_id.in_(_split(args['machines'])))
+    rows = db.session.execute(query).all()
+
+    # Taxas do cliente por máquina, em unidades inteiras (ver services.money)
+    machine_ids = {row.machine_id for row in rows}
+    units_by_machine = {
+        config.machine_id: [rate_units(rate) for rate in build_rate_vector(config)]
+        for config in MachineConfig.query.filter(MachineConfig.machine_id.in_(machine_ids))
+    } if machine_ids else {}
+
+    groups = {}
+    totals = [0, 0, 0, 0]
+    for periodo, machine_id, forma, parcelas, transacoes, bruto, taxa in rows:
+        # SUM de BIGINT no PostgreSQL vem como Decimal
+        transacoes, bruto, taxa = int(transacoes), int(bruto), int(taxa)
+        if isinstance(periodo, str):
+            periodo = date.fromisoformat(periodo)
+        elif isinstance(periodo, datetime):
+            periodo = periodo.date()
+        periodo = bucket_start(periodo, granularity)
+
+        tipo, num_parcelas = classify_payment(forma, parcelas)
+        units = units_by_machine.get(machine_id)
+        taxa_cliente = apply_rate(bruto, units[rate_slot(tipo, num_parcelas)]) if units else 0
+
+        key = (periodo, _group_key(group_by, machine_id, tipo, num_parcelas))
+        current = groups.get(key)
+        if current is None:
+            current = groups[key] = [0, 0, 0, 0]
+        for values in (current, totals):
+            values[0] += transacoes
+            values[1] += bruto
+            values[2] += taxa
+            values[3] += taxa_cliente
+
+    # Parcelas em ordem numérica (à vista por último); demais grupos em ordem alfabética
+    if group_by == 'installments':
+        group_order = lambda group: (1, 0) if group == GRUPO_A_VISTA else (0, group)
+    else:
+        group_order = str
+    buckets = []
+    for (periodo, group), values in sorted(groups.items(), key=lambda item: (item[0][0], group_order(item[0][1]))):
+        entry = {'periodo': periodo.isoformat()}
+        if group_by is not None:
+            entry['grupo'] = group
+        entry.update(_totals_dict(values))
+        buckets.append(entry)
+
+    return {
+        'success': True,
+        'granularity': granularity,
+        'group_by': group_by,
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'buckets': buckets,
+        'totals': _totals_dict(totals)
+    }
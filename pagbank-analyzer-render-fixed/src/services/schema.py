@@ -0,0 +1,55 @@
+import logging
+import os
+import threading
+import time
+from flask import current_app
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Preparação do banco (create_all, migrações e totais consolidados) fora do import da aplicação:
+#   - `flask --app src.main init-db` prepara o banco explicitamente;
+#   - com o gunicorn em preload_app (ver gunicorn.conf.py) o processo mestre prepara uma vez,
+#     antes de criar os workers;
+#   - DB_AUTO_INIT=1 (padrão): quem ainda não preparou faz isso na primeira requisição.
+DB_AUTO_INIT = os.environ.get('DB_AUTO_INIT', '1') != '0'
+
+_lock = threading.Lock()
+
+def _load_models():
+    # Todas as tabelas precisam estar no metadata antes do create_all
+    from src.models import client_config, import_job, machine, machine_summary  # noqa: F401
+
+def init_schema():
+    """Cria as tabelas que faltam, aplica as migrações e reconstrói os totais se estiverem vazios"""
+    from src.migrations import run_migrations
+    from src.services.summaries import ensure_summaries
+
+    start = time.perf_counter()
+    _load_models()
+    db.create_all()
+    run_migrations()
+    ensure_summaries()
+    logger.info("🗄️ Esquema do banco pronto em %.0f ms", (time.perf_counter() - start) * 1000)
+
+def prepare_app(app):
+    """Prepara o banco uma vez e marca a aplicação como pronta (usado antes do fork dos workers)"""
+    with app.app_context():
+        init_schema()
+        # Não herdar conexões abertas pelo processo mestre
+        db.engine.dispose()
+    app.extensions['schema_ready'] = True
+
+def _ensure_schema():
+    app = current_app._get_current_object()
+    if app.extensions.get('schema_ready'):
+        return
+    with _lock:
+        if not app.extensions.get('schema_ready'):
+            init_schema()
+            app.extensions['schema_ready'] = True
+
+def init_lazy_schema(app):
+    """Prepara o banco na primeira requisição do processo, se ainda não estiver pronto"""
+    if DB_AUTO_INIT:
+        app.before_request(_ensure_schema)
@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+from flask import current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há a variante gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Arquivos estáticos lidos uma única vez: conteúdo em memória, variantes gzip/brotli
+# pré-comprimidas e ETag pelo hash do conteúdo. A leitura acontece no processo mestre do
+# gunicorn (preload, ver gunicorn.conf.py) ou na primeira requisição de um arquivo estático.
+# Cada arquivo também responde em um nome com impressão digital (favicon.<hash>.ico), que
+# pode ser guardado pelo navegador por tempo indeterminado; os demais nomes sempre
+# revalidam (304 se não mudou).
+# Arquivos criados depois da leitura só aparecem ao reiniciar a aplicação.
+
+# Arquivos maiores ficam em disco (sem variantes comprimidas)
+STATIC_MEMORY_MAX_BYTES = int(os.environ.get('STATIC_MEMORY_MAX_BYTES', str(1024 * 1024)))
+STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', str(365 * 24 * 3600)))
+# Qualidade 11 comprime mais, mas leva dezenas de ms por arquivo (pago uma vez por processo)
+STATIC_BROTLI_QUALITY = int(os.environ.get('STATIC_BROTLI_QUALITY', '11'))
+
+# Só guardar a variante comprimida se economizar ao menos isso
+MIN_COMPRESSION_GAIN = 0.1
+
+FINGERPRINT_LENGTH = 12
+
+_COMPRESSIBLE = re.compile(r'^(text/|application/(javascript|json|xml|manifest\+json)|image/(svg\+xml|x-icon|vnd\.microsoft\.icon))')
+
+# Referências a outros arquivos estáticos no HTML (href="/x", src="x")
+_HTML_REFERENCE = re.compile(r'''((?:href|src)=["'])/?([^"':?#]+)(["'])''')
+
+class StaticAsset:
+    """Um arquivo estático com suas variantes (identity, gzip, br)"""
+
+    __slots__ = ('name', 'path', 'mimetype', 'etag', 'fingerprinted_name', 'variants')
+
+    def __init__(self, name, path, content):
+        self.name = name
+        self.path = path
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        digest = hashlib.sha256(content).hexdigest() if content is not None else self._file_digest()
+        self.etag = digest[:32]
+        stem, ext = os.path.splitext(self.name)
+        self.fingerprinted_name = f'{stem}.{digest[:FINGERPRINT_LENGTH]}{ext}'
+        # Variantes em memória: codificação -> bytes (None = servir do disco)
+        self.variants = {}
+        if content is None:
+            return
+        self.variants['identity'] = content
+        if _COMPRESSIBLE.match(self.mimetype):
+            self._add_variant('gzip', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add_variant('br', brotli.compress(content, quality=STATIC_BROTLI_QUALITY))
+
+    def _add_variant(self, encoding, compressed):
+        if len(compressed) <= len(self.variants['identity']) * (1 - MIN_COMPRESSION_GAIN):
+            self.variants[encoding] = compressed
+
+    def _file_digest(self):
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as source:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def etags(self):
+        return [self.etag] + [f'{self.etag}-{encoding}' for encoding in self.variants if encoding != 'identity']
+
+class StaticAssets:
+    """Índice em memória da pasta static, montado uma vez por processo"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.assets = {}
+        self.fingerprinted = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Lê e comprime os arquivos (só na primeira chamada)"""
+        if self.loaded:
+            return self
+        with self._lock:
+            if not self.loaded:
+                if self.folder and os.path.isdir(self.folder):
+                    self._scan()
+                self.loaded = True
+        return self
+
+    def _scan(self):
+        html = []
+        for directory, _, files in os.walk(self.folder):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.folder).replace(os.sep, '/')
+                content = None
+                if os.path.getsize(path) <= STATIC_MEMORY_MAX_BYTES:
+                    with open(path, 'rb') as source:
+                        content = source.read()
+                if content is not None and mimetypes.guess_type(name)[0] == 'text/html':
+                    html.append((name, path, content))
+                else:
+                    self.assets[name] = StaticAsset(name, path, content)
+
+        # HTML por último: as referências apontam para os nomes com impressão digital
+        for name, path, content in html:
+            self.assets[name] = StaticAsset(name, path, self._fingerprint_references(content))
+        self.fingerprinted = {asset.fingerprinted_name: asset for asset in self.assets.values()}
+
+        total = sum(len(variant) for asset in self.assets.values() for variant in asset.variants.values())
+        logger.info("📦 %d arquivos estáticos em memória (%d KB com variantes comprimidas, brotli %s)",
+                    len(self.assets), total // 1024, 'ligado' if brotli is not None else 'indisponível')
+
+    def _fingerprint_references(self, content):
+        def replace(match):
+            asset = self.assets.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f'{match.group(1)}/{asset.fingerprinted_name}{match.group(3)}'
+        return _HTML_REFERENCE.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+    def url(self, name):
+        """Caminho com impressão digital de um arquivo estático"""
+        asset = self.load().assets.get(name)
+        return f'/{asset.fingerprinted_name}' if asset else f'/{name}'
+
+    def lookup(self, path):
+        """(arquivo, imutável) para o caminho pedido; None se não for um arquivo estático"""
+        self.load()
+        asset = self.fingerprinted.get(path)
+        if asset is not None:
+            return asset, True
+        asset = self.assets.get(path)
+        return (asset, False) if asset is not None else None
+
+def _preferred_encoding(asset):
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in asset.variants and accepted[encoding] > 0:
+            return encoding
+    return 'identity'
+
+def asset_response(asset, immutable=False):
+    """Resposta com a variante aceita pelo cliente, ETag e cabeçalhos de cache (304 se não mudou)"""
+    app = current_app
+    if asset.variants:
+        encoding = _preferred_encoding(asset)
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+    else:
+        encoding, etag = 'identity', asset.etag
+
+    # Qualquer variante do mesmo conteúdo serve de validação
+    if any(tag in request.if_none_match for tag in asset.etags()):
+        response = app.response_class(status=304)
+    elif asset.variants:
+        response = app.response_class(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_file(asset.path, mimetype=asset.mimetype, conditional=False, etag=False)
+
+    response.set_etag(etag)
+    if len(asset.variants) > 1:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        # Sempre revalidar com If-None-Match antes de reutilizar
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
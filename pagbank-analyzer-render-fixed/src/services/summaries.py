@@ -0,0 +1,122 @@
+import logging
+from datetime import datetime
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.machine import Transaction
+from src.models.machine_summary import MachineDailySummary, MachineSummary
+
+logger = logging.getLogger(__name__)
+
+TOTAL_FIELDS = ('total_transacoes', 'valor_bruto_centavos', 'valor_taxa_centavos', 'valor_liquido_centavos')
+
+def _accumulate(totals, key, record):
+    current = totals.get(key)
+    if current is None:
+        current = totals[key] = [0, 0, 0, 0]
+    current[0] += 1
+    current[1] += record['valor_bruto_centavos']
+    current[2] += record['valor_taxa_centavos']
+    current[3] += record['valor_liquido_centavos']
+
+def apply_summary_deltas(records):
+    """Soma aos totais consolidados as transações recém-gravadas de um lote"""
+    per_machine = {}
+    per_day = {}
+    for record in records:
+        _accumulate(per_machine, record['machine_id'], record)
+        _accumulate(per_day, (
+            record['machine_id'],
+            record['data_transacao'].date(),
+            record['forma_pagamento'] or '',
+            record['parcelas'] or ''
+        ), record)
+
+    now = datetime.utcnow()
+    _upsert_deltas(
+        MachineSummary, ('machine_id',),
+        [{'machine_id': key, **dict(zip(TOTAL_FIELDS, values)), 'ingest_version': 1, 'updated_at': now}
+         for key, values in per_machine.items()]
+    )
+    _upsert_deltas(
+        MachineDailySummary, ('machine_id', 'dia', 'forma_pagamento', 'parcelas'),
+        [{'machine_id': key[0], 'dia': key[1], 'forma_pagamento': key[2], 'parcelas': key[3],
+          **dict(zip(TOTAL_FIELDS, values)), 'updated_at': now}
+         for key, values in per_day.items()]
+    )
+
+def _upsert_deltas(model, key_fields, rows):
+    """INSERT ... ON CONFLICT DO UPDATE somando os deltas aos totais existentes"""
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(model)
+        table = model.__table__
+        set_ = {field: table.c[field] + stmt.excluded[field] for field in TOTAL_FIELDS}
+        if 'ingest_version' in table.c:
+            set_['ingest_version'] = table.c.ingest_version + 1
+        set_['updated_at'] = stmt.excluded.updated_at
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_fields), set_=set_)
+        db.session.execute(stmt, rows)
+        return
+
+    # Outros bancos: ler e atualizar linha a linha
+    for row in rows:
+        existing = model.query.filter_by(**{field: row[field] for field in key_fields}).first()
+        if existing is None:
+            db.session.add(model(**row))
+        else:
+            for field in TOTAL_FIELDS:
+                setattr(existing, field, getattr(existing, field) + row[field])
+            if hasattr(existing, 'ingest_version'):
+                existing.ingest_version += 1
+            existing.updated_at = row['updated_at']
+    db.session.flush()
+
+def remove_machine_summaries(machine_ids):
+    """Apaga os totais consolidados das máquinas informadas"""
+    db.session.execute(delete(MachineDailySummary).where(MachineDailySummary.machine_id.in_(machine_ids)))
+    db.session.execute(delete(MachineSummary).where(MachineSummary.machine_id.in_(machine_ids)))
+
+def rebuild_summaries():
+    """Recalcula do zero os totais consolidados a partir da tabela de transações"""
+    now = datetime.utcnow()
+    db.session.execute(delete(MachineDailySummary))
+    db.session.execute(delete(MachineSummary))
+
+    sums = (
+        func.count(Transaction.id),
+        func.coalesce(func.sum(Transaction.valor_bruto_centavos), 0),
+        func.coalesce(func.sum(Transaction.valor_taxa_centavos), 0),
+        func.coalesce(func.sum(Transaction.valor_liquido_centavos), 0),
+        literal(now, db.DateTime)
+    )
+
+    db.session.execute(
+        insert(MachineSummary).from_select(
+            ['machine_id', *TOTAL_FIELDS, 'updated_at'],
+            select(Transaction.machine_id, *sums).group_by(Transaction.machine_id)
+        )
+    )
+
+    dia = func.date(Transaction.data_transacao)
+    forma_pagamento = func.coalesce(Transaction.forma_pagamento, '')
+    parcelas = func.coalesce(Transaction.parcelas, '')
+    db.session.execute(
+        insert(MachineDailySummary).from_select(
+            ['machine_id', 'dia', 'forma_pagamento', 'parcelas', *TOTAL_FIELDS, 'updated_at'],
+            select(Transaction.machine_id, dia, forma_pagamento, parcelas, *sums)
+            .group_by(Transaction.machine_id, dia, forma_pagamento, parcelas)
+        )
+    )
+    db.session.commit()
+
+def ensure_summaries():
+    """Reconstrói os totais se a tabela consolidada estiver vazia e já houver transações"""
+    has_summaries = db.session.query(MachineSummary.id).limit(1).first() is not None
+    has_transactions = db.session.query(Transaction.id).limit(1).first() is not None
+    if has_transactions and not has_summaries:
+        logger.info("🧮 Tabela de totais vazia - reconstruindo a partir das transações...")
+        rebuild_summaries()
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from src.models.machine import Transaction
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Colunas aceitas em ?sort= (sempre desempatadas pelo id); valores ordenados em centavos
+SORT_COLUMNS = {
+    'data_transacao': Transaction.data_transacao,
+    'valor_bruto': Transaction.valor_bruto_centavos,
+    'valor_taxa': Transaction.valor_taxa_centavos,
+    'valor_liquido': Transaction.valor_liquido_centavos,
+}
+
+def _parse_date(value, end_of_day=False):
+    """Aceita DD/MM/YYYY ou YYYY-MM-DD (com hora opcional)"""
+    value = value.strip()
+    for fmt in ('%d/%m/%Y %H:%M', '%d/%m/%Y', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if end_of_day and len(value) <= 10:
+            # Data sem hora no limite superior: incluir o dia inteiro
+            return parsed + timedelta(days=1), True
+        return parsed, False
+    raise ValueError(f'Data inválida: {value}')
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def encode_cursor(sort_value, row_id):
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if sort == 'data_transacao':
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+
+def transactions_page(machine_id, args):
+    """Busca uma página de transações com filtros e paginação por cursor (keyset)"""
+    sort = args.get('sort', 'data_transacao')
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f'Ordenação inválida: {sort}')
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f'Direção de ordenação inválida: {order}')
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit deve ser um número inteiro')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    sort_column = SORT_COLUMNS[sort]
+    query = Transaction.query.filter(Transaction.machine_id == machine_id)
+
+    if args.get('date_from'):
+        date_from, _ = _parse_date(args['date_from'])
+        query = query.filter(Transaction.data_transacao >= date_from)
+    if args.get('date_to'):
+        date_to, exclusive = _parse_date(args['date_to'], end_of_day=True)
+        query = query.filter(Transaction.data_transacao < date_to if exclusive else Transaction.data_transacao <= date_to)
+    if args.get('forma_pagamento'):
+        query = query.filter(Transaction.forma_pagamento.in_(_split(args['forma_pagamento'])))
+    if args.get('parcelas'):
+        query = query.filter(Transaction.parcelas.in_(_split(args['parcelas'])))
+    if args.get('status'):
+        query = query.filter(Transaction.status.in_(_split(args['status'])))
+
+    if args.get('cursor'):
+        last_value, last_id = decode_cursor(args['cursor'], sort)
+        if order == 'desc':
+            query = query.filter(or_(
+                sort_column < last_value,
+                and_(sort_column == last_value, Transaction.id < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > last_value,
+                and_(sort_column == last_value, Transaction.id > last_id)
+            ))
+
+    if order == 'desc':
+        query = query.order_by(sort_column.desc(), Transaction.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), Transaction.id.asc())
+
+    # Uma linha a mais indica se existe próxima página
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+
+    return rows, next_cursor, {'sort': sort, 'order': order, 'limit': limit}
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask import Flask
+from sqlalchemy import select
+from src.models.user import db
+from src.models.machine import Transaction
+from src.models.machine_summary import MachineDailySummary, MachineSummary
+from src.services.database import configure_database
+from src.services.ingest import BulkImporter
+from src.services.schema import init_schema
+from src.services.summaries import rebuild_summaries
+
+def _row(codigo, valor):
+    return {
+        'Identificação da Maquininha': '7000000001',
+        'Código da Transação': codigo,
+        'Data da Transação': '02/01/2025 10:00',
+        'Forma de Pagamento': 'Cartão de Crédito',
+        'Parcela': '1x',
+        'Valor Bruto': valor,
+        'Valor Líquido': '9,50',
+        'Status': 'Aprovada',
+        'Nome Cliente': 'Loja',
+        'E-mail Cliente': 'loja@example.com',
+    }
+
+def _rollups():
+    summaries = db.session.execute(
+        select(MachineSummary.machine_id, MachineSummary.total_transacoes,
+               MachineSummary.valor_bruto_centavos, MachineSummary.valor_taxa_centavos)
+        .order_by(MachineSummary.machine_id)
+    ).all()
+    daily = db.session.execute(
+        select(MachineDailySummary.machine_id, MachineDailySummary.dia, MachineDailySummary.forma_pagamento,
+               MachineDailySummary.parcelas, MachineDailySummary.total_transacoes,
+               MachineDailySummary.valor_bruto_centavos)
+        .order_by(MachineDailySummary.machine_id, MachineDailySummary.dia, MachineDailySummary.parcelas)
+    ).all()
+    return [tuple(row) for row in summaries], [tuple(row) for row in daily]
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    configure_database(app, f'sqlite:///{tmp_path / "ingest.db"}')
+    with app.app_context():
+        init_schema()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def test_conflict_after_existence_check_is_not_counted(app, monkeypatch):
+    rows = [_row('TX-1', '10,00'), _row('TX-2', '20,00'), _row('TX-3', '30,00')]
+
+    def other_import():
+        # Outra importação (outra sessão) grava os mesmos códigos
+        with app.app_context():
+            importer = BulkImporter()
+            importer.import_rows(rows)
+            db.session.commit()
+            db.session.remove()
+
+    # Confirmar a outra importação depois da consulta de duplicatas e antes do INSERT
+    upsert_machines = BulkImporter._upsert_machines
+    def upsert_after_other_import(self, records):
+        monkeypatch.setattr(BulkImporter, '_upsert_machines', upsert_machines)
+        thread = threading.Thread(target=other_import)
+        thread.start()
+        thread.join()
+        upsert_machines(self, records)
+    monkeypatch.setattr(BulkImporter, '_upsert_machines', upsert_after_other_import)
+
+    importer = BulkImporter()
+    importer.import_rows(rows)
+    db.session.commit()
+
+    assert importer.new_transactions == 0
+    assert importer.skipped_duplicates == 3
+    assert db.session.query(Transaction).count() == 3
+
+    incremental = _rollups()
+    rebuild_summaries()
+    assert incremental == _rollups()
+    assert incremental[0] == [('7000000001', 3, 6000, 3150)]
+
+def test_reimport_counts_duplicates(app):
+    rows = [_row('TX-1', '10,00'), _row('TX-1', '10,00'), _row('TX-2', '20,00')]
+    first = BulkImporter()
+    first.import_rows(rows)
+    db.session.commit()
+    assert (first.new_transactions, first.skipped_duplicates) == (2, 1)
+
+    second = BulkImporter()
+    second.import_rows(rows)
+    db.session.commit()
+    assert (second.new_transactions, second.skipped_duplicates) == (0, 3)
+    assert db.session.get(Transaction, 1).data_transacao == datetime(2025, 1, 2, 10, 0)